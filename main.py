@@ -32,7 +32,7 @@ def main():
 
     for i in range(0, len(llm_output), chunk_size):
         chunk = llm_output[i:i + chunk_size]
-        print(f"📦 处理chunk: {repr(chunk)}")
+        print(f"📦 处理chunk: {chunk!r}")
 
         # 解析chunk并处理事件
         for event_type, data in parser.parse_chunk(chunk):
@@ -41,7 +41,7 @@ def main():
             elif event_type == 'END_TAG':
                 print(f"  🏁 结束标签: {data}")
             elif event_type == 'CONTENT':
-                print(f"  📝 内容: {repr(data)}")
+                print(f"  📝 内容: {data!r}")
 
         print()
 
@@ -49,7 +49,7 @@ def main():
     print("🔚 处理剩余内容:")
     for event_type, data in parser.finalize():
         if event_type == 'CONTENT':
-            print(f"  📝 最终内容: {repr(data)}")
+            print(f"  📝 最终内容: {data!r}")
 
     print("\n✅ 解析完成!")
 
@@ -0,0 +1,96 @@
+"""
+分块输入缓冲区
+
+流式解析器共用的输入缓冲：输入的chunk按片段保存在队列中，配合读取偏移消费，
+避免每次追加或前进时拼接、切片整个缓冲区。
+
+chunk 可以是 str，也可以是UTF-8编码的 bytes/bytearray/memoryview（例如直接来自网络流）。
+字节输入会被增量解码，被chunk边界截断的多字节字符会保留到下一个chunk再解码；
+流结束时仍不完整的字符在 finalize 中报错。
+"""
+
+import codecs
+from collections import deque
+from itertools import islice
+from typing import Tuple, Union
+
+
+# UTF-8 增量解码器类型
+_Utf8Decoder = codecs.getincrementaldecoder('utf-8')
+
+
+class ChunkBuffer:
+    """分块输入缓冲区，供流式解析器继承使用"""
+
+    __slots__ = ('_chunks', '_head', '_total_len', '_decoder')
+
+    def _reset_buffer(self):
+        """清空缓冲区"""
+        self._chunks: deque[str] = deque()  # 尚未消费的输入片段
+        self._head = 0  # 在 _chunks[0] 中的读取偏移
+        self._total_len = 0  # 尚未消费的字符总数
+        self._decoder = None  # 字节输入的增量解码器，首次收到字节时创建
+
+    def _feed(self, chunk: Union[str, bytes]):
+        """追加一个输入片段，字节输入先按UTF-8增量解码"""
+        if not isinstance(chunk, str):
+            decoder = self._decoder
+            if decoder is None:
+                decoder = self._decoder = _Utf8Decoder()
+            chunk = decoder.decode(chunk)
+            if not chunk:
+                return
+        self._chunks.append(chunk)
+        self._total_len += len(chunk)
+
+    def _flush_decoder(self):
+        """
+        流结束时冲刷增量解码器
+
+        末尾残留不完整的多字节字符时抛出 UnicodeDecodeError，与无效字节在解码时报错一致，
+        不会静默丢弃这些字节。解码器同时被丢弃，下一个流重新创建。
+        """
+        decoder = self._decoder
+        if decoder is not None:
+            self._decoder = None
+            decoder.decode(b'', final=True)
+
+    def _tail_lacks(self, char: str) -> bool:
+        """
+        判断最近追加的片段中是否不含 char
+
+        解析器等待某个字符（例如标签的 '>'）时，之前的片段都已确认不含它，
+        只需检查新到达的片段；仍未出现时可以直接返回，不必拼接缓冲区再从头查找，
+        避免长标签跨越大量chunk时的二次方开销。
+        """
+        chunks = self._chunks
+        return not chunks or char not in chunks[-1]
+
+    def _peek(self) -> Tuple[str, int]:
+        """
+        返回尚未消费的内容及其起始位置
+
+        只在存在多个片段时才拼接（同时丢弃已消费的前缀），
+        否则直接返回首个片段和读取偏移，避免复制尾部。
+        """
+        chunks = self._chunks
+        if not chunks:
+            return "", 0
+        if len(chunks) > 1:
+            joined = chunks[0][self._head:] + "".join(islice(chunks, 1, None))
+            chunks.clear()
+            chunks.append(joined)
+            self._head = 0
+        return chunks[0], self._head
+
+    def _advance(self, n: int):
+        """消费 n 个字符，丢弃已被完全消费的片段"""
+        self._total_len -= n
+        chunks = self._chunks
+        n += self._head
+        while chunks and n >= len(chunks[0]):
+            n -= len(chunks.popleft())
+        self._head = n
+
+
+__all__ = ['ChunkBuffer']
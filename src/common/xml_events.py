@@ -5,10 +5,11 @@ XML解析器事件类型定义
 """
 
 from enum import Enum
+from typing import Callable, Dict, Union
 
 
-class XMLEventType(Enum):
-    """XML解析器事件类型枚举"""
+class XMLEventType(str, Enum):
+    """XML解析器事件类型枚举（继承str，可与字符串常量直接比较）"""
     
     START_TAG = "START_TAG"
     """起始标签事件，如 <tag>"""
@@ -33,10 +34,50 @@ START_TAG = XMLEventType.START_TAG.value
 END_TAG = XMLEventType.END_TAG.value
 CONTENT = XMLEventType.CONTENT.value
 
+# 整数事件码，按 START_TAG、END_TAG、CONTENT 的顺序编号，可直接作为下标分发
+EVENT_START, EVENT_END, EVENT_CONTENT = 0, 1, 2
+
+# 事件类型到整数事件码的映射（XMLEventType 继承 str，字符串常量同样可以查询）
+EVENT_CODES = {
+    XMLEventType.START_TAG: EVENT_START,
+    XMLEventType.END_TAG: EVENT_END,
+    XMLEventType.CONTENT: EVENT_CONTENT,
+}
+
+# 整数事件码到事件类型的反向映射，按事件码下标取值，用于显示或还原为字符串事件
+EVENT_NAMES = (XMLEventType.START_TAG, XMLEventType.END_TAG, XMLEventType.CONTENT)
+
+# 事件类型（及整数事件码）到事件处理器方法名的映射，各解析器的事件处理器统一按它分发
+EVENT_HANDLER_NAMES = {
+    XMLEventType.START_TAG: 'on_start_tag',
+    XMLEventType.END_TAG: 'on_end_tag',
+    XMLEventType.CONTENT: 'on_content',
+    EVENT_START: 'on_start_tag',
+    EVENT_END: 'on_end_tag',
+    EVENT_CONTENT: 'on_content',
+}
+
+
+def handler_dispatch_table(handler) -> Dict[Union[str, int], Callable]:
+    """
+    构建事件类型（及整数事件码）到处理器绑定方法的分发表
+
+    供 parse_*_stream 在一次解析内直接分发事件；分发表不缓存在处理器上，
+    不会形成引用循环，处理方法在两次解析之间被替换时也不会失效。
+    """
+    return {event_type: getattr(handler, name) for event_type, name in EVENT_HANDLER_NAMES.items()}
+
 # 导出所有事件类型
 __all__ = [
     'XMLEventType',
     'START_TAG', 
     'END_TAG', 
-    'CONTENT'
+    'CONTENT',
+    'EVENT_START',
+    'EVENT_END',
+    'EVENT_CONTENT',
+    'EVENT_CODES',
+    'EVENT_NAMES',
+    'EVENT_HANDLER_NAMES',
+    'handler_dispatch_table'
 ]
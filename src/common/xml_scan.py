@@ -0,0 +1,76 @@
+"""
+XML扫描公共函数
+
+各流式解析器共用的词法扫描逻辑：标签名提取、空白判断和结束标签的KMP匹配。
+"""
+
+import re
+import sys
+from typing import List, Optional
+
+
+# 标签名：字母或下划线开头，后接字母、数字、下划线或连字符；前导空白由正则跳过
+TAG_NAME_RE = re.compile(r'\s*([a-zA-Z_][a-zA-Z0-9_-]*)')
+
+# 非空白字符，与 str.isspace() 的判断一致
+NONSPACE_RE = re.compile(r'\S')
+
+# 标签名正则的 match 方法，模块级绑定以省去每次调用时的属性查找
+_match_tag_name = TAG_NAME_RE.match
+
+
+def extract_tag_name(tag_content: str) -> Optional[str]:
+    """从标签内容中提取标签名，返回驻留后的字符串"""
+    # 常见情况下标签内容就是标签名本身：ASCII 标识符恰好满足标签名规则，
+    # 用C实现的字符串方法直接判断，避免进入正则引擎
+    if tag_content.isascii() and tag_content.isidentifier():
+        return sys.intern(tag_content)
+
+    # 其余情况（带属性、前导空白、连字符等）交给正则：实测对这类短字符串，
+    # 正则的C实现比 translate/逐字符查表的纯Python分类更快。
+    # 提取标签名（第一个单词），match 本身锚定在开头，无需先 strip() 复制字符串
+    match = _match_tag_name(tag_content)
+    # 驻留标签名，重复出现的标签共享同一个字符串对象，比较和哈希都更快
+    return sys.intern(match.group(1)) if match else None
+
+
+def has_nonspace(s: str) -> bool:
+    """判断字符串是否包含非空白字符，与 s.strip() 的真值相同但不分配新字符串"""
+    return bool(s) and not s.isspace()
+
+
+def build_failure(pattern: str) -> List[int]:
+    """构建KMP部分匹配表，fail[i] 为 pattern[:i + 1] 最长的相等真前缀/真后缀长度"""
+    fail = [0] * len(pattern)
+    k = 0
+    for i in range(1, len(pattern)):
+        while k and pattern[i] != pattern[k]:
+            k = fail[k - 1]
+        if pattern[i] == pattern[k]:
+            k += 1
+        fail[i] = k
+    return fail
+
+
+def kmp_partial_match(text: str, start: int, pattern: str, fail: List[int]) -> int:
+    """用KMP扫描 text[start:]，返回其后缀能匹配的 pattern 最长前缀长度"""
+    q = 0
+    for i in range(start, len(text)):
+        ch = text[i]
+        while q and ch != pattern[q]:
+            q = fail[q - 1]
+        if ch == pattern[q]:
+            q += 1
+            if q == len(pattern):
+                q = fail[q - 1]
+    return q
+
+
+__all__ = [
+    'TAG_NAME_RE',
+    'NONSPACE_RE',
+    'extract_tag_name',
+    'has_nonspace',
+    'build_failure',
+    'kmp_partial_match'
+]
@@ -16,23 +16,36 @@
 - (XMLEventType.CONTENT, text_chunk, level): 内容（包括伪标签）
 """
 
-from typing import Dict, List, Optional, Tuple, Generator
-from enum import Enum
 import re
-from src.common.xml_events import XMLEventType
+import sys
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Generator, Union
+from enum import IntEnum
+from src.common.chunk_buffer import ChunkBuffer
+from src.common.xml_events import (
+    EVENT_NAMES, EVENT_START, EVENT_END, EVENT_CONTENT,
+    EVENT_HANDLER_NAMES, handler_dispatch_table,
+)
+from src.common.xml_scan import extract_tag_name, has_nonspace
 
 
 class TagNode:
     """标签节点，表示标签层次结构中的一个节点"""
+
+    __slots__ = ('name', 'level', 'children', 'parent', 'end_tag_content')
     
     def __init__(self, name: str, level: int = 0):
-        self.name = name
+        # 驻留标签名：解析出的标签名同样是驻留的，查找子节点时可直接按对象身份命中
+        self.name = sys.intern(name)
+        # 规范结束标签的标签内容（'<' 与 '>' 之间的部分）只依赖标签名，构造时生成一次，解析时直接比较
+        self.end_tag_content = f"/{self.name}"
         self.level = level
         self.children: Dict[str, 'TagNode'] = {}
         self.parent: Optional['TagNode'] = None
     
     def add_child(self, child_name: str) -> 'TagNode':
         """添加子标签"""
+        child_name = sys.intern(child_name)
         if child_name not in self.children:
             child = TagNode(child_name, self.level + 1)
             child.parent = self
@@ -55,29 +68,108 @@ class TagNode:
         return f"TagNode({self.name}, level={self.level}, children={list(self.children.keys())})"
 
 
-class ParserState(Enum):
+class ParserState(IntEnum):
     """解析器状态"""
-    CONTENT = "content"
-    IN_TAG = "in_tag"
-    IN_CONTENT = "in_content"
+    CONTENT = 0
+    IN_TAG = 1
+    IN_CONTENT = 2
+
+
+# 标签外的词法单元：文本、完整的标签、以及尚未闭合的 '<'
+_TOKEN_RE = re.compile(r'([^<]+)|<([^>]*)>|<')
+
+
+# 解析循环中使用的整数状态，比较时不经过枚举成员查找，且与 ParserState 的成员相等
+_ST_CONTENT = ParserState.CONTENT.value
+_ST_IN_TAG = ParserState.IN_TAG.value
+_ST_IN_CONTENT = ParserState.IN_CONTENT.value
+
+# 解析循环产生事件时使用的 (开始, 结束, 内容) 事件类型：默认为字符串事件类型，
+# parse_chunk_raw 换成整数事件码，扫描器直接产生对应的事件，无需事后转换
+_RAW_EVENT_TYPES = (EVENT_START, EVENT_END, EVENT_CONTENT)
+
+
+def _hierarchy_key(hierarchy: Dict[str, List[str]]) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    """层次结构的可哈希键，保留声明顺序（同一子标签出现在多个父标签下时，构建结果与顺序有关）"""
+    return tuple((parent, tuple(children)) for parent, children in hierarchy.items())
+
+
+@lru_cache(maxsize=64)
+def _compile_hierarchy(build_tag_tree: Callable[[Dict[str, List[str]]], Dict[str, TagNode]],
+                       hierarchy_key: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> Tuple[tuple, ...]:
+    """
+    把层次结构编译为不可变的节点表，按 (构建函数, 层次结构) 缓存，相同的层次结构只构建一次
+
+    节点表按先序排列，每项为 (节点类型, 标签名, 层级, 父节点下标)，根标签的父节点下标为 -1
+    """
+    spec: List[tuple] = []
+    for node in build_tag_tree({parent: list(children) for parent, children in hierarchy_key}).values():
+        _flatten_tag_node(node, -1, spec)
+    return tuple(spec)
+
+
+def _flatten_tag_node(node: TagNode, parent_index: int, spec: List[tuple]):
+    """把节点及其子树按先序追加到节点表"""
+    index = len(spec)
+    spec.append((type(node), node.name, node.level, parent_index))
+    for child in node.children.values():
+        _flatten_tag_node(child, index, spec)
 
 
-class DynamicTreeParser:
+def _instantiate_tag_tree(spec: Tuple[tuple, ...]) -> TagNode:
+    """按节点表生成一棵新的标签树，返回根级别的伪节点"""
+    root_node = TagNode("", -1)
+    nodes: List[TagNode] = []
+    for node_type, name, level, parent_index in spec:
+        node = node_type(name, level)
+        if parent_index < 0:
+            root_node.children[node.name] = node
+        else:
+            parent = nodes[parent_index]
+            node.parent = parent
+            parent.children[node.name] = node
+        nodes.append(node)
+    return root_node
+
+
+class DynamicTreeParser(ChunkBuffer):
     """动态树形流式XML解析器"""
+
+    __slots__ = (
+        'tag_tree', '_root_node', 'state', 'tag_stack', 'invalid_tag_depth',
+        'coalesce_content', '_pending_content', '_pending_level',
+    )
     
-    def __init__(self, tag_hierarchy: Dict[str, List[str]]):
+    def __init__(self, tag_hierarchy: Dict[str, List[str]], coalesce_content: bool = False):
         """
         初始化解析器
         
         Args:
             tag_hierarchy: 标签层次结构，格式为 {parent: [child1, child2, ...]}
                           例如: {"Action": ["ToolName", "Description"], "Description": ["Feature"]}
+            coalesce_content: 是否合并内容事件。为 True 时，连续的同层级CONTENT片段
+                          会暂存起来，直到出现标签事件或调用 finalize 时才合并为一个事件输出；
+                          默认逐片段实时输出
         """
-        self.tag_tree = self._build_tag_tree(tag_hierarchy)
+        self.coalesce_content = coalesce_content
+
+        # 根级别的伪节点：它的子节点就是所有根标签，层级为 -1，
+        # 使得每个上下文（包括根级别）都可以统一通过节点的 children 做转移查找。
+        # 相同的层次结构只编译一次节点表，每个解析器再按节点表生成自己的标签树，节点不在解析器之间共享
+        spec = _compile_hierarchy(type(self)._build_tag_tree, _hierarchy_key(tag_hierarchy))
+        self._root_node = _instantiate_tag_tree(spec)
+        self.tag_tree = self._root_node.children
         self.reset()
     
-    def _build_tag_tree(self, hierarchy: Dict[str, List[str]]) -> Dict[str, TagNode]:
-        """构建标签树"""
+    @staticmethod
+    def _build_tag_tree(hierarchy: Dict[str, List[str]]) -> Dict[str, TagNode]:
+        """
+        构建标签树
+
+        每个节点的 children 字典就是该节点的邻接表：解析时以原始标签内容为键查找一次，
+        即可同时完成"是否为当前上下文的有效子标签"的校验并取得子节点，
+        不再需要遍历列表或把标签名先映射为整数编号。
+        """
         # 创建所有节点
         nodes = {}
         
@@ -88,7 +180,8 @@ class DynamicTreeParser:
             all_tags.update(children)
         
         for tag in all_tags:
-            nodes[tag] = TagNode(tag)
+            node = TagNode(tag)
+            nodes[node.name] = node
         
         # 建立父子关系
         for parent_name, children in hierarchy.items():
@@ -107,221 +200,335 @@ class DynamicTreeParser:
     
     def reset(self):
         """重置解析器状态"""
-        self.state = ParserState.CONTENT
-        self.buffer = ""
+        self.state = _ST_CONTENT
+        self._reset_buffer()  # 尚未处理的输入片段及读取偏移
         self.tag_stack: List[TagNode] = []  # 当前标签栈
-        self.current_context: Optional[TagNode] = None  # 当前上下文节点
         self.invalid_tag_depth = 0  # 当前无效标签的嵌套深度
+        self._pending_content: List[str] = []  # 合并模式下暂存的CONTENT片段
+        self._pending_level = 0  # 暂存片段的层级
     
-    def parse_chunk(self, chunk: str) -> Generator[Tuple[str, str, int], None, None]:
+    @property
+    def current_context(self) -> Optional[TagNode]:
+        """当前上下文节点（标签栈顶），根级别时为 None"""
+        return self.tag_stack[-1] if self.tag_stack else None
+
+    def parse_chunk(self, chunk: Union[str, bytes]) -> Generator[Tuple[str, str, int], None, None]:
         """
         解析一个文本块，产生事件
         
         Args:
-            chunk: 输入的文本块
+            chunk: 输入的文本块（str 或UTF-8编码的 bytes）
             
         Yields:
             Tuple[str, str, int]: (事件类型, 数据, 层级)
         """
+        return self._events(chunk, EVENT_NAMES)
+
+    def feed(self, data: Union[str, bytes]) -> List[Tuple[str, str, int]]:
+        """
+        推送式接口：输入一段数据，返回这段数据能够确定的全部事件
+
+        与 llhttp 等推送式解析器一样，事件可能跨多次 feed 分段产生：
+        被截断的标签要等后续数据到达才会输出，内容也可能拆成多个CONTENT事件。
+        已消费的输入会被及时丢弃，缓冲区只保留尚未确定的尾部；流结束时调用 finalize 取得剩余事件。
+
+        Args:
+            data: 输入数据（str 或UTF-8编码的 bytes）
+
+        Returns:
+            List[Tuple[str, str, int]]: 本次产生的事件
+        """
+        return list(self.parse_chunk(data))
+
+    def parse_chunk_raw(self, chunk: Union[str, bytes]) -> Generator[Tuple[int, str, int], None, None]:
+        """
+        解析一个文本块，产生事件类型为整数事件码的事件
+
+        与 parse_chunk 产生相同的事件，只是事件类型换成 EVENT_START/EVENT_END/EVENT_CONTENT，
+        调用方可以按下标或整数分发，不必比较事件类型字符串。
+
+        Args:
+            chunk: 输入的文本块（str 或UTF-8编码的 bytes）
+
+        Yields:
+            Tuple[int, str, int]: (整数事件码, 数据, 层级)
+        """
+        return self._events(chunk, _RAW_EVENT_TYPES)
+
+    def _events(self, chunk: Union[str, bytes], types: Tuple[Any, Any, Any]) -> Generator[tuple, None, None]:
+        """解析一个文本块产生事件，合并模式下先经过内容合并"""
+        events = self._scan(chunk, types)
+        return self._coalesced(events, types[EVENT_CONTENT]) if self.coalesce_content else events
+
+    def _scan(self, chunk: Union[str, bytes], types: Tuple[Any, Any, Any]) -> Generator[tuple, None, None]:
+        """
+        运行状态机解析一个文本块，逐个产生事件（未经合并）
+
+        Args:
+            chunk: 输入的文本块（str 或UTF-8编码的 bytes）
+            types: 按事件码排列的 (开始, 结束, 内容) 事件类型
+        """
         if not chunk:
             return
         
-        # 将新的chunk添加到缓冲区
-        self.buffer += chunk
-        
-        while True:
-            if self.state == ParserState.CONTENT:
-                # 寻找下一个可能的标签开始
-                lt_pos = self.buffer.find('<')
-                
-                if lt_pos == -1:
-                    # 没有找到标签，输出剩余内容
-                    if self.buffer.strip():
-                        yield (XMLEventType.CONTENT, self.buffer, 0)
-                    self.buffer = ""
-                    break
-                else:
-                    # 找到标签开始，先输出之前的内容
-                    if lt_pos > 0:
-                        content = self.buffer[:lt_pos]
-                        if content.strip():
-                            yield (XMLEventType.CONTENT, content, 0)
-                    
-                    # 进入标签解析状态
-                    self.state = ParserState.IN_TAG
-                    self.buffer = self.buffer[lt_pos + 1:]  # 移除 '<'
-            
-            elif self.state == ParserState.IN_TAG:
-                # 在标签内，寻找标签结束
-                gt_pos = self.buffer.find('>')
-                
-                if gt_pos == -1:
-                    # 标签未完整，等待更多数据
+        # 将新的chunk追加为片段，避免每次拼接整个缓冲区
+        self._feed(chunk)
+
+        if self.state == _ST_IN_TAG and self._tail_lacks('>'):
+            # 标签仍未闭合，缓冲区其余部分已确认不含 '>'
+            return
+
+        # 循环中反复使用的属性、方法和事件类型先绑定为局部变量；
+        # 状态在循环内只读写局部变量，退出时（包括生成器被提前关闭时）写回
+        start_type, end_type, content_type = types
+        peek = self._peek
+        advance = self._advance
+        tag_stack = self.tag_stack
+        root_node = self._root_node
+        state = self.state
+
+        try:
+            while self._total_len:
+                buffer, pos = peek()
+
+                if state == _ST_IN_TAG:
+                    # 标签的 '<' 已在之前的chunk中消费，寻找标签结束
+                    gt_pos = buffer.find('>', pos)
+
+                    if gt_pos == -1:
+                        # 标签未完整，等待更多数据
+                        break
+
+                    advance(gt_pos + 1 - pos)  # 移除标签内容和 '>'
+                    event = self._handle_tag(buffer[pos:gt_pos], None, types)
+                    state = _ST_IN_CONTENT if tag_stack else _ST_CONTENT
+                    yield event
+                    continue
+
+                # CONTENT 和 IN_CONTENT 状态的词法完全相同，区别只在于内容的层级和空白过滤。
+                # 流式输入的chunk通常很小，往往不含完整的标签：先用两次 find 处理这种情况，
+                # 只有确实存在完整标签时才启动正则扫描
+                lt_pos = buffer.find('<', pos)
+                if lt_pos == -1 or buffer.find('>', lt_pos) == -1:
+                    # 剩余部分是文本，可能以一个尚未闭合的标签结尾
+                    end = len(buffer) if lt_pos == -1 else lt_pos
+                    if lt_pos == -1:
+                        advance(len(buffer) - pos)
+                        state = _ST_IN_CONTENT if tag_stack else _ST_CONTENT
+                    else:
+                        # 跳过 '<'，等待标签的其余部分
+                        advance(lt_pos + 1 - pos)
+                        state = _ST_IN_TAG
+
+                    if end > pos:
+                        content = buffer[pos:end]
+                        if tag_stack:
+                            yield (content_type, content, tag_stack[-1].level + 1)
+                        elif has_nonspace(content):
+                            # 根级别只输出包含非空白字符的内容
+                            yield (content_type, content, 0)
                     break
-                else:
-                    # 找到完整标签
-                    tag_content = self.buffer[:gt_pos]
-                    self.buffer = self.buffer[gt_pos + 1:]  # 移除标签内容和 '>'
-                    
-                    # 解析标签
-                    tag_processed = False
-
-                    if tag_content.startswith('/'):
-                        # 结束标签
-                        tag_name = self._extract_tag_name(tag_content[1:])
-                        if tag_name:
-                            end_result = self._handle_end_tag(tag_name)
-                            if end_result:
-                                event_type, data, level = end_result
-                                yield (event_type, data, level)
-                                tag_processed = True
+
+                # 用预编译的词法正则在C层一次扫描文本和完整标签。已处理到的位置记在 done 中，
+                # 扫描结束时一次性前进；生成器在产生事件时被关闭也会前进到当前标记之后，
+                # 使缓冲区与已更新的标签栈一致
+                done = pos
+                try:
+                    for match in _TOKEN_RE.finditer(buffer, pos):
+                        done = match.end()
+                        kind = match.lastindex
+
+                        if kind == 1:
+                            # 标签间的文本内容
+                            if tag_stack:
+                                yield (content_type, match.group(1), tag_stack[-1].level + 1)
                             else:
-                                # 不是有效的结束标签，减少无效标签深度
-                                self.invalid_tag_depth = max(0, self.invalid_tag_depth - 1)
-                    else:
-                        # 开始标签
-                        tag_name = self._extract_tag_name(tag_content)
-                        if tag_name:
-                            start_result = self._handle_start_tag(tag_name)
-                            if start_result:
-                                event_type, data, level = start_result
-                                yield (event_type, data, level)
-                                tag_processed = True
+                                # 根级别只输出包含非空白字符的内容
+                                content = match.group(1)
+                                if has_nonspace(content):
+                                    yield (content_type, content, 0)
+                        elif kind == 2:
+                            # 完整的标签。先处理最常见的两种情况：当前标签规范的结束标签，
+                            # 以及恰好是当前上下文允许的子标签名的开始标签；其余交给通用处理
+                            tag_content = match.group(2)
+                            if tag_stack:
+                                current_tag = tag_stack[-1]
+                                if tag_content == current_tag.end_tag_content:
+                                    tag_stack.pop()
+                                    yield (end_type, current_tag.name, current_tag.level)
+                                    continue
                             else:
-                                # 不是有效标签，增加无效标签深度
-                                self.invalid_tag_depth += 1
-
-                    # 如果标签没有被处理（不是有效标签），将其作为内容输出
-                    if not tag_processed:
-                        level = self.tag_stack[-1].level + 1 if self.tag_stack else 0
-                        full_tag = f"<{tag_content}>"
-                        yield (XMLEventType.CONTENT, full_tag, level)
-
-                    # 根据当前状态决定下一步
-                    if self.tag_stack:
-                        self.state = ParserState.IN_CONTENT
-                    else:
-                        self.state = ParserState.CONTENT
-            
-            elif self.state == ParserState.IN_CONTENT:
-                # 在已识别标签内，寻找子标签或结束标签
-                if not self.tag_stack:
-                    # 标签栈为空，回到CONTENT状态
-                    self.state = ParserState.CONTENT
-                    continue
-                
-                current_tag = self.tag_stack[-1]
-                
-                # 寻找可能的结束标签
-                end_tag_pattern = f"</{current_tag.name}>"
-                end_pos = self.buffer.find(end_tag_pattern)
-                
-                # 寻找可能的子标签
-                lt_pos = self.buffer.find('<')
-                
-                if end_pos != -1 and (lt_pos == -1 or end_pos <= lt_pos):
-                    # 找到当前标签的结束标签，且它在任何其他标签之前
-                    if end_pos > 0:
-                        content = self.buffer[:end_pos]
-                        if content:
-                            yield (XMLEventType.CONTENT, content, current_tag.level + 1)
-
-                    # 处理结束标签
-                    yield (XMLEventType.END_TAG, current_tag.name, current_tag.level)
-                    self.tag_stack.pop()
-                    self.buffer = self.buffer[end_pos + len(end_tag_pattern):]
-                    
-                    # 更新当前上下文
-                    self.current_context = self.tag_stack[-1] if self.tag_stack else None
-                    
-                    if not self.tag_stack:
-                        self.state = ParserState.CONTENT
-                
-                elif lt_pos != -1:
-                    # 找到可能的标签开始
-                    if lt_pos > 0:
-                        content = self.buffer[:lt_pos]
-                        if content:
-                            yield (XMLEventType.CONTENT, content, current_tag.level + 1)
-                    
-                    # 进入标签解析状态
-                    self.state = ParserState.IN_TAG
-                    self.buffer = self.buffer[lt_pos + 1:]  # 移除 '<'
-                
-                else:
-                    # 没有找到任何标签，输出剩余内容
-                    if self.buffer:
-                        yield (XMLEventType.CONTENT, self.buffer, current_tag.level + 1)
-                    self.buffer = ""
-                    break
-    
-    def _handle_start_tag(self, tag_name: str) -> Optional[Tuple[str, str, int]]:
-        """处理开始标签"""
-        # 检查这个标签是否在当前上下文中有效，并且没有被无效标签包围
-        if not self.tag_stack:
-            # 当前在根级别，检查是否是根标签，且没有无效标签包围
-            if tag_name in self.tag_tree and self.invalid_tag_depth == 0:
-                node = self.tag_tree[tag_name]
-                self.tag_stack.append(node)
-                self.current_context = node
-                return (XMLEventType.START_TAG, tag_name, node.level)
+                                current_tag = root_node
+                            if not self.invalid_tag_depth:
+                                node = current_tag.children.get(tag_content)
+                                if node is not None:
+                                    tag_stack.append(node)
+                                    yield (start_type, node.name, node.level)
+                                    continue
+                            yield self._handle_tag(tag_content, match.group(0), types)
+                        else:
+                            # 标签未完整（其后没有 '>'），跳过 '<' 等待更多数据
+                            state = _ST_IN_TAG
+                            return
+
+                    # 缓冲区已全部消费
+                    done = len(buffer)
+                finally:
+                    advance(done - pos)
+                state = _ST_IN_CONTENT if tag_stack else _ST_CONTENT
+                break
+        finally:
+            self.state = state
+
+    def _handle_tag(self, tag_content: str, full_tag: Optional[str],
+                    types: Tuple[Any, Any, Any]) -> tuple:
+        """
+        处理一个完整的标签：识别为有效的开始或结束标签，否则作为内容原样输出
+
+        Args:
+            tag_content: '<' 与 '>' 之间的标签内容
+            full_tag: 包括尖括号的完整标签文本，未知时为 None
+            types: 按事件码排列的 (开始, 结束, 内容) 事件类型
+
+        Returns:
+            tuple: 该标签对应的事件
+        """
+        start_type, end_type, content_type = types
+        tag_stack = self.tag_stack
+
+        if tag_content.startswith('/'):
+            # 结束标签：最常见的是当前标签规范的结束标签，直接整体比较
+            if tag_stack:
+                current_tag = tag_stack[-1]
+                if tag_content == current_tag.end_tag_content:
+                    tag_stack.pop()
+                    return (end_type, current_tag.name, current_tag.level)
+
+            tag_name = extract_tag_name(tag_content[1:])
+            if tag_name:
+                node = self._handle_end_tag(tag_name)
+                if node is not None:
+                    return (end_type, node.name, node.level)
+                # 不是有效的结束标签，减少无效标签深度（不低于0）
+                if self.invalid_tag_depth:
+                    self.invalid_tag_depth -= 1
         else:
-            # 当前在某个标签内，检查是否是有效的直接子标签，且没有无效标签包围
-            current_tag = self.tag_stack[-1]
+            # 开始标签。最常见的情况是标签内容恰好就是当前上下文允许的子标签名：
+            # 层次结构已固定在节点的 children 字典上，直接用原始内容查找，
+            # 一次查找即完成校验，跳过通用的标签名提取
+            if not self.invalid_tag_depth:
+                context = tag_stack[-1] if tag_stack else self._root_node
+                node = context.children.get(tag_content)
+                if node is not None:
+                    tag_stack.append(node)
+                    return (start_type, node.name, node.level)
 
-            if (current_tag.is_valid_child(tag_name) and
-                self.invalid_tag_depth == 0):
-                child_node = current_tag.get_child(tag_name)
-                self.tag_stack.append(child_node)
-                self.current_context = child_node
-                return (XMLEventType.START_TAG, tag_name, child_node.level)
+            tag_name = extract_tag_name(tag_content)
+            if tag_name:
+                node = self._handle_start_tag(tag_name)
+                if node is not None:
+                    return (start_type, node.name, node.level)
+                # 不是有效标签，增加无效标签深度
+                self.invalid_tag_depth += 1
 
-        # 如果不是有效标签，不产生事件（将作为内容处理）
-        return None
+        # 标签没有被处理（不是有效标签），将其作为内容原样输出
+        context = tag_stack[-1] if tag_stack else self._root_node
+        if full_tag is None:
+            full_tag = f"<{tag_content}>"
+        return (content_type, full_tag, context.level + 1)
+
+    def _handle_start_tag(self, tag_name: str) -> Optional[TagNode]:
+        """处理开始标签，是有效标签时入栈并返回其节点"""
+        # 被无效标签包围时，任何标签都不是有效标签
+        if self.invalid_tag_depth:
+            return None
+
+        # 当前上下文允许的子标签：根级别为根伪节点的子节点（即根标签），否则为栈顶标签的直接子标签。
+        # 层次结构在初始化时已固定为节点上的字典，一次查找即可同时完成校验和取节点
+        tag_stack = self.tag_stack
+        context = tag_stack[-1] if tag_stack else self._root_node
+        node = context.children.get(tag_name)
+        if node is not None:
+            tag_stack.append(node)
+        # 如果不是有效标签，返回 None（将作为内容处理）
+        return node
     
-    def _handle_end_tag(self, tag_name: str) -> Optional[Tuple[str, str, int]]:
-        """处理结束标签"""
+    def _handle_end_tag(self, tag_name: str) -> Optional[TagNode]:
+        """处理结束标签，匹配当前标签栈顶时出栈并返回其节点"""
         # 检查是否匹配当前标签栈顶的标签
         if self.tag_stack and self.tag_stack[-1].name == tag_name:
-            node = self.tag_stack.pop()
-            self.current_context = self.tag_stack[-1] if self.tag_stack else None
-            return (XMLEventType.END_TAG, tag_name, node.level)
-        
-        # 如果不匹配，不产生事件（将作为内容处理）
-        return None
-    
-    def _extract_tag_name(self, tag_content: str) -> Optional[str]:
-        """从标签内容中提取标签名"""
-        if not tag_content:
-            return None
-        
-        # 移除前后空白
-        tag_content = tag_content.strip()
-        
-        # 提取标签名（第一个单词）
-        match = re.match(r'^([a-zA-Z_][a-zA-Z0-9_-]*)', tag_content)
-        if match:
-            return match.group(1)
+            return self.tag_stack.pop()
         
+        # 如果不匹配，返回 None（将作为内容处理）
         return None
     
+    def _coalesced(self, events: Iterable[tuple], content_type: Any) -> Generator[tuple, None, None]:
+        """合并模式：CONTENT片段先暂存，层级变化或出现标签事件时才合并输出"""
+        pending = self._pending_content
+
+        for event in events:
+            if event[0] == content_type:
+                level = event[2]
+                if pending and level != self._pending_level:
+                    yield self._flush_pending(content_type)
+                self._pending_level = level
+                pending.append(event[1])
+            else:
+                if pending:
+                    yield self._flush_pending(content_type)
+                yield event
+
+    def _flush_pending(self, content_type: Any) -> tuple:
+        """将暂存的CONTENT片段合并为一个事件"""
+        pending = self._pending_content
+        content = pending[0] if len(pending) == 1 else "".join(pending)
+        pending.clear()
+        return (content_type, content, self._pending_level)
+
     def finalize(self) -> Generator[Tuple[str, str, int], None, None]:
         """
         完成解析，输出剩余的内容
         
         Yields:
             Tuple[str, str, int]: 剩余的内容事件
+
+        Raises:
+            UnicodeDecodeError: 字节输入的末尾是不完整的UTF-8字符
+        """
+        return self._finalize(EVENT_NAMES[EVENT_CONTENT])
+
+    def finalize_raw(self) -> Generator[Tuple[int, str, int], None, None]:
         """
-        if self.buffer:
-            level = self.tag_stack[-1].level + 1 if self.tag_stack else 0
-            if self.buffer.strip():
-                yield (XMLEventType.CONTENT, self.buffer, level)
+        完成解析，输出剩余的内容，事件类型为整数事件码（与 parse_chunk_raw 配套使用）
+
+        Yields:
+            Tuple[int, str, int]: 剩余的内容事件
+        """
+        return self._finalize(EVENT_CONTENT)
+
+    def _finalize(self, content_type: Any) -> Generator[tuple, None, None]:
+        """输出剩余的内容并重置解析状态，content_type 为内容事件的事件类型"""
+        self._flush_decoder()
+
+        events: List[tuple] = []
+
+        if self._total_len:
+            buffer, pos = self._peek()
+            content = buffer[pos:]
+            context = self.tag_stack[-1] if self.tag_stack else self._root_node
+            if has_nonspace(content):
+                events.append((content_type, content, context.level + 1))
+
+        if self.coalesce_content:
+            # 合并模式下剩余内容与暂存的内容一起合并，并输出最后暂存的内容
+            events = list(self._coalesced(events, content_type))
+            if self._pending_content:
+                events.append(self._flush_pending(content_type))
         
-        # 重置状态
-        self.buffer = ""
-        self.tag_stack = []
-        self.current_context = None
-        self.invalid_tag_depth = 0
+        # 重置解析状态（包括状态机状态），解析器可以直接用于下一个流；标签树保持不变
+        self.reset()
+
+        yield from events
     
     def get_tag_hierarchy_info(self) -> str:
         """获取标签层次结构信息"""
@@ -353,18 +560,45 @@ class DynamicTreeEventHandler:
         """处理内容事件"""
         pass
     
-    def handle_event(self, event_type: str, data: str, level: int):
-        """处理事件的统一入口"""
-        if event_type == 'START_TAG':
-            self.on_start_tag(data, level)
+    def handle_event(self, event_type: Union[str, int], data: str, level: int):
+        """处理事件的统一入口，event_type 可以是事件类型或整数事件码"""
+        method_name = EVENT_HANDLER_NAMES.get(event_type)
+        if method_name is not None:
+            getattr(self, method_name)(data, level)
+
+
+def classify_events(events: Iterable[Tuple[str, str, int]]) -> Dict[str, Any]:
+    """
+    一次遍历按事件类型和标签名对事件分组
+
+    适合需要反复按类型、标签名筛选事件的校验场景，避免对同一个事件列表做多次列表推导。
+
+    Args:
+        events: (事件类型, 数据, 层级) 形式的事件
+
+    Returns:
+        Dict[str, Any]: {'START_TAG': {标签名: [事件, ...]}, 'END_TAG': {标签名: [事件, ...]},
+                         'CONTENT': [事件, ...]}，各分组内保持事件原有的顺序
+    """
+    start_tags: Dict[str, List[Tuple[str, str, int]]] = {}
+    end_tags: Dict[str, List[Tuple[str, str, int]]] = {}
+    contents: List[Tuple[str, str, int]] = []
+
+    for event in events:
+        event_type = event[0]
+        if event_type == 'CONTENT':
+            contents.append(event)
+        elif event_type == 'START_TAG':
+            start_tags.setdefault(event[1], []).append(event)
         elif event_type == 'END_TAG':
-            self.on_end_tag(data, level)
-        elif event_type == 'CONTENT':
-            self.on_content(data, level)
+            end_tags.setdefault(event[1], []).append(event)
+
+    return {'START_TAG': start_tags, 'END_TAG': end_tags, 'CONTENT': contents}
 
 
 def parse_dynamic_stream(chunks, tag_hierarchy: Dict[str, List[str]], 
-                        event_handler: DynamicTreeEventHandler):
+                        event_handler: DynamicTreeEventHandler,
+                        coalesce_content: bool = False):
     """
     便利函数：使用动态树形解析器解析流式数据
     
@@ -372,12 +606,21 @@ def parse_dynamic_stream(chunks, tag_hierarchy: Dict[str, List[str]],
         chunks: 可迭代的文本块
         tag_hierarchy: 标签层次结构
         event_handler: 事件处理器
+        coalesce_content: 是否合并连续的内容片段，见 DynamicTreeParser
     """
-    parser = DynamicTreeParser(tag_hierarchy)
-    
-    for chunk in chunks:
-        for event_type, data, level in parser.parse_chunk(chunk):
-            event_handler.handle_event(event_type, data, level)
+    parser = DynamicTreeParser(tag_hierarchy, coalesce_content)
+
+    if type(event_handler).handle_event is DynamicTreeEventHandler.handle_event:
+        # 未重写 handle_event 时按事件类型直接调用处理方法，省去每个事件经过 handle_event 的一层调用
+        dispatch = handler_dispatch_table(event_handler)
+        for chunk in chunks:
+            for event_type, data, level in parser.parse_chunk(chunk):
+                dispatch[event_type](data, level)
+    else:
+        handle_event = event_handler.handle_event
+        for chunk in chunks:
+            for event_type, data, level in parser.parse_chunk(chunk):
+                handle_event(event_type, data, level)
     
     # 处理剩余内容
     for event_type, data, level in parser.finalize():
@@ -11,39 +11,67 @@
 - (XMLEventType.START_TAG, tag_name): 最外层的起始标签
 - (XMLEventType.END_TAG, tag_name): 最外层的结束标签
 - (XMLEventType.CONTENT, text_chunk): 标签间的文本内容（可能包含内层XML）
+
+纯空白的内容不会作为 CONTENT 事件输出：最外层标签内的纯空白片段会暂存，
+与下一个含可见字符的片段合并输出；若直到结束标签都没有可见字符则被丢弃。
+因此事件处理器无需再自行判断 content.strip()。
 """
 
 import re
-from enum import Enum
-from typing import Generator, Tuple, Optional
-from src.common.xml_events import XMLEventType
+from enum import IntEnum
+from itertools import islice
+from typing import Generator, Iterable, List, Tuple, Optional, Union
+from src.common.chunk_buffer import ChunkBuffer
+from src.common.xml_events import XMLEventType, EVENT_HANDLER_NAMES, handler_dispatch_table
+from src.common.xml_scan import (
+    NONSPACE_RE, extract_tag_name, has_nonspace, build_failure, kmp_partial_match
+)
+
 
+# 标签外的词法单元：文本、完整标签、以及尚未闭合的 '<'
+_OUTER_TOKEN_RE = re.compile(r'([^<]+)|<([^>]*)>|<')
 
-class OuterParserState(Enum):
+
+class OuterParserState(IntEnum):
     """外层解析器状态枚举"""
-    CONTENT = "content"          # 在最外层标签外，解析内容
-    IN_TAG = "in_tag"           # 在标签内，收集标签名
-    IN_CONTENT = "in_content"   # 在最外层标签内，收集内容
+    CONTENT = 0          # 在最外层标签外，解析内容
+    IN_TAG = 1           # 在标签内，收集标签名
+    IN_CONTENT = 2       # 在最外层标签内，收集内容
+
 
+# 解析循环中使用的整数状态，比较时不经过枚举成员查找，且与 OuterParserState 的成员相等
+_S_CONTENT = OuterParserState.CONTENT.value
+_S_IN_TAG = OuterParserState.IN_TAG.value
+_S_IN_CONTENT = OuterParserState.IN_CONTENT.value
 
-class OuterXMLParser:
+
+class OuterXMLParser(ChunkBuffer):
     """外层XML解析器 - 只解析最外层标签"""
 
+    __slots__ = (
+        'state', 'current_outer_tag',
+        '_end_pat', '_end_len', '_kmp_fail', '_pending_space',
+    )
+
     def __init__(self):
         self.reset()
 
     def reset(self):
         """重置解析器状态"""
-        self.state = OuterParserState.CONTENT
-        self.buffer = ""  # 缓冲区，存储所有输入
+        self.state = _S_CONTENT
+        self._reset_buffer()
         self.current_outer_tag = None  # 当前的最外层标签
-        
-    def parse_chunk(self, chunk: str) -> Generator[Tuple[str, str], None, None]:
+        self._end_pat = ""  # 当前最外层标签的结束标签
+        self._end_len = 0  # 结束标签的长度
+        self._kmp_fail: List[int] = []  # 结束标签的KMP部分匹配表
+        self._pending_space: List[str] = []  # 最外层标签内暂存的纯空白片段
+
+    def parse_chunk(self, chunk: Union[str, bytes]) -> Generator[Tuple[str, str], None, None]:
         """
         解析一个文本块，产生事件
 
         Args:
-            chunk: 输入的文本块
+            chunk: 输入的文本块（str 或UTF-8编码的 bytes）
 
         Yields:
             Tuple[str, str]: (事件类型, 数据)
@@ -51,61 +79,107 @@ class OuterXMLParser:
         if not chunk:
             return
 
-        # 将新的chunk添加到缓冲区
-        self.buffer += chunk
+        # 将新的chunk追加为片段，避免每次拼接整个缓冲区
+        self._feed(chunk)
+
+        yield from self._drain()
+
+    def feed(self, data: Union[str, bytes]) -> List[Tuple[str, str]]:
+        """
+        推送式接口：输入一段数据，返回这段数据能够确定的全部事件
+
+        与 llhttp 等推送式解析器一样，事件可能跨多次 feed 分段产生：
+        被截断的标签要等后续数据到达才会输出，内容也可能拆成多个CONTENT事件。
+        已消费的输入会被及时丢弃，缓冲区只保留尚未确定的尾部；流结束时调用 finalize 取得剩余事件。
+
+        Args:
+            data: 输入数据（str 或UTF-8编码的 bytes）
+
+        Returns:
+            List[Tuple[str, str]]: 本次产生的事件
+        """
+        if not data:
+            return []
+
+        self._feed(data)
+        return list(self._drain())
+
+    def parse_chunks(self, chunks: Iterable[Union[str, bytes]]) -> Generator[Tuple[str, str], None, None]:
+        """
+        批量解析多个文本块，产生事件
+
+        与对每个chunk分别调用 parse_chunk 产生相同的事件，调用方只需迭代一个生成器，
+        省去逐个chunk创建和驱动 parse_chunk 生成器的开销。
+
+        Args:
+            chunks: 可迭代的文本块（str 或UTF-8编码的 bytes）
+
+        Yields:
+            Tuple[str, str]: (事件类型, 数据)
+        """
+        for chunk in chunks:
+            if chunk:
+                self._feed(chunk)
+                yield from self._drain()
+
+    def _drain(self) -> Generator[Tuple[str, str], None, None]:
+        """运行状态机处理缓冲区中的内容，直到需要更多数据为止"""
+        if self.state == _S_IN_TAG and self._tail_lacks('>'):
+            # 标签仍未闭合，缓冲区其余部分已确认不含 '>'
+            return
 
-        # 处理缓冲区中的内容
         while True:
-            if self.state == OuterParserState.CONTENT:
-                # 寻找下一个标签开始
-                lt_pos = self.buffer.find('<')
-
-                if lt_pos == -1:
-                    # 没有找到标签，输出剩余内容并等待更多数据
-                    if self.buffer.strip():
-                        yield (XMLEventType.CONTENT, self.buffer)
-                    self.buffer = ""
-                    break
-                else:
-                    # 找到标签开始，先输出之前的内容
-                    if lt_pos > 0:
-                        content = self.buffer[:lt_pos]
-                        if content.strip():
+            buffer, pos = self._peek()
+
+            if self.state == _S_CONTENT:
+                # 用预编译的词法正则一次扫描标签外的文本和完整标签
+                for match in _OUTER_TOKEN_RE.finditer(buffer, pos):
+                    self._advance(match.end() - match.start())
+                    kind = match.lastindex
+
+                    if kind == 1:
+                        # 标签外的文本内容
+                        content = match.group(1)
+                        if has_nonspace(content):
                             yield (XMLEventType.CONTENT, content)
+                    elif kind == 2:
+                        # 完整的标签
+                        if self._enter_outer_tag(match.group(2)):
+                            yield (XMLEventType.START_TAG, self.current_outer_tag)
+                            break
+                    else:
+                        # 标签跨越了chunk边界，进入标签解析状态等待 '>'
+                        self.state = _S_IN_TAG
+                        break
+                else:
+                    # 缓冲区已全部消费
+                    break
 
-                    # 进入标签解析状态
-                    self.state = OuterParserState.IN_TAG
-                    self.buffer = self.buffer[lt_pos + 1:]  # 移除 '<' 和之前的内容
-
-            elif self.state == OuterParserState.IN_TAG:
+            elif self.state == _S_IN_TAG:
                 # 在标签内，寻找标签结束
-                gt_pos = self.buffer.find('>')
+                gt_pos = buffer.find('>', pos)
 
                 if gt_pos == -1:
                     # 标签未完整，等待更多数据
                     break
                 else:
                     # 找到完整标签
-                    tag_content = self.buffer[:gt_pos]
-                    tag_name = self._extract_tag_name(tag_content)
-
-                    if tag_name:
-                        # 这是一个新的最外层标签
-                        self.current_outer_tag = tag_name
-                        yield (XMLEventType.START_TAG, tag_name)
-                        self.state = OuterParserState.IN_CONTENT
-
-                    self.buffer = self.buffer[gt_pos + 1:]  # 移除标签内容和 '>'
+                    self._advance(gt_pos + 1 - pos)  # 移除标签内容和 '>'
+                    if self._enter_outer_tag(buffer[pos:gt_pos]):
+                        yield (XMLEventType.START_TAG, self.current_outer_tag)
+                    else:
+                        self.state = _S_CONTENT
 
-            elif self.state == OuterParserState.IN_CONTENT:
+            elif self.state == _S_IN_CONTENT:
                 # 在最外层标签内，寻找匹配的结束标签
-                end_tag_pattern = f"</{self.current_outer_tag}>"
-                end_pos = self.buffer.find(end_tag_pattern)
+                end_tag_pattern = self._end_pat
+                end_tag_len = self._end_len
+                end_pos = buffer.find(end_tag_pattern, pos)
 
                 if end_pos != -1:
                     # 找到完整的匹配结束标签
-                    if end_pos > 0:
-                        content = self.buffer[:end_pos]
+                    if end_pos > pos:
+                        content = self._visible_content(buffer[pos:end_pos])
                         if content:
                             yield (XMLEventType.CONTENT, content)
 
@@ -114,69 +188,101 @@ class OuterXMLParser:
 
                     # 重置状态
                     self.current_outer_tag = None
-                    self.state = OuterParserState.CONTENT
-                    self.buffer = self.buffer[end_pos + len(end_tag_pattern):]
+                    self._end_pat = ""
+                    self._end_len = 0
+                    self._kmp_fail = []
+                    self._pending_space.clear()
+                    self.state = _S_CONTENT
+                    self._advance(end_pos + end_tag_len - pos)
                 else:
                     # 没有找到完整的结束标签，检查缓冲区末尾是否可能是结束标签的开始
-                    max_keep = min(len(end_tag_pattern) - 1, len(self.buffer))
-
-                    # 检查缓冲区末尾的各种长度是否匹配结束标签的开始
-                    keep_length = 0
-                    for length in range(1, max_keep + 1):
-                        suffix = self.buffer[-length:]
-                        if end_tag_pattern.startswith(suffix):
-                            keep_length = length
-
-                    if keep_length > 0:
-                        # 保留可能的结束标签开始部分，输出其余内容
-                        content_end = len(self.buffer) - keep_length
-                        if content_end > 0:
-                            content = self.buffer[:content_end]
-                            if content:
-                                yield (XMLEventType.CONTENT, content)
-                        self.buffer = self.buffer[content_end:]
-                        break
+                    max_keep = min(end_tag_len - 1, len(buffer) - pos)
+                    tail_start = len(buffer) - max_keep
+
+                    lt_pos = buffer.find('<', tail_start)
+                    if lt_pos == -1:
+                        # 结束标签以 '<' 开头，末尾窗口内没有 '<' 时不可能残留其前缀
+                        keep_length = 0
                     else:
-                        # 没有可能的部分匹配，输出所有内容并等待更多数据
-                        if self.buffer:
-                            yield (XMLEventType.CONTENT, self.buffer)
-                        self.buffer = ""
-                        break
+                        # 用KMP扫描缓冲区末尾，得到能匹配结束标签开头的最长后缀。
+                        # 第一个 '<' 之前的字符不可能参与匹配，KMP从 '<' 处开始逐字符扫描即可
+                        keep_length = kmp_partial_match(
+                            buffer, lt_pos, end_tag_pattern, self._kmp_fail
+                        )
+
+                    # 保留可能的结束标签开始部分，输出其余内容并等待更多数据
+                    content_end = len(buffer) - keep_length
+                    if content_end > pos:
+                        content = self._visible_content(buffer[pos:content_end])
+                        if content:
+                            yield (XMLEventType.CONTENT, content)
+                    self._advance(content_end - pos)
+                    break
     
 
     
 
     
-    def _extract_tag_name(self, tag_content: str) -> Optional[str]:
-        """从标签内容中提取标签名"""
-        if not tag_content:
-            return None
-            
-        # 移除前后空白
-        tag_content = tag_content.strip()
-        
-        # 提取标签名（第一个单词）
-        match = re.match(r'^([a-zA-Z_][a-zA-Z0-9_-]*)', tag_content)
-        if match:
-            return match.group(1)
-        
+    def _visible_content(self, content: str) -> Optional[str]:
+        """
+        返回可以输出的内容片段
+
+        纯空白片段先暂存并返回 None，遇到含可见字符的片段时再把暂存的空白拼接在前面输出。
+        """
+        if has_nonspace(content):
+            pending = self._pending_space
+            if pending:
+                pending.append(content)
+                content = "".join(pending)
+                pending.clear()
+            return content
+        # 暂存为片段列表，大量空白片段连续到达时不会反复拼接字符串
+        self._pending_space.append(content)
         return None
-    
+
+    def _enter_outer_tag(self, tag_content: str) -> bool:
+        """如果标签内容是有效的起始标签，进入该最外层标签"""
+        tag_name = extract_tag_name(tag_content)
+        if not tag_name:
+            return False
+
+        # 结束标签通常只有十来个字符，进入标签时直接构建KMP表，不按标签名缓存
+        end_pat = f"</{tag_name}>"
+        self.current_outer_tag = tag_name
+        self._end_pat = end_pat
+        self._end_len = len(end_pat)
+        self._kmp_fail = build_failure(end_pat)
+        self.state = _S_IN_CONTENT
+        return True
+
     def finalize(self) -> Generator[Tuple[str, str], None, None]:
         """
         完成解析，输出剩余的内容
 
         Yields:
             Tuple[str, str]: 剩余的内容事件
+
+        Raises:
+            UnicodeDecodeError: 字节输入的末尾是不完整的UTF-8字符
         """
+        self._flush_decoder()
+
+        events: List[Tuple[str, str]] = []
+
         # 如果还有未处理的内容
-        if self.buffer:
-            if self.buffer.strip():
-                yield (XMLEventType.CONTENT, self.buffer)
+        if self._total_len:
+            # 直接在各片段上查找非空白字符，纯空白的尾部无需拼接或切片
+            chunks = self._chunks
+            if NONSPACE_RE.search(chunks[0], self._head) or any(
+                NONSPACE_RE.search(part) for part in islice(chunks, 1, None)
+            ):
+                buffer, pos = self._peek()
+                events.append((XMLEventType.CONTENT, "".join(self._pending_space) + buffer[pos:]))
+
+        # 先重置解析状态（包括状态机状态）再输出事件，解析器可以直接用于下一个流
+        self.reset()
 
-        # 重置状态
-        self.buffer = ""
-        self.current_outer_tag = None
+        yield from events
 
 
 class OuterXMLEventHandler:
@@ -194,14 +300,11 @@ class OuterXMLEventHandler:
         """处理内容事件（可能包含内层XML）"""
         pass
     
-    def handle_event(self, event_type: str, data: str):
-        """处理事件的统一入口"""
-        if event_type == 'START_TAG':
-            self.on_start_tag(data)
-        elif event_type == 'END_TAG':
-            self.on_end_tag(data)
-        elif event_type == 'CONTENT':
-            self.on_content(data)
+    def handle_event(self, event_type: Union[str, int], data: str):
+        """处理事件的统一入口，event_type 可以是事件类型或整数事件码"""
+        method_name = EVENT_HANDLER_NAMES.get(event_type)
+        if method_name is not None:
+            getattr(self, method_name)(data)
 
 
 def parse_outer_stream(chunks, event_handler: OuterXMLEventHandler):
@@ -213,10 +316,16 @@ def parse_outer_stream(chunks, event_handler: OuterXMLEventHandler):
         event_handler: 事件处理器
     """
     parser = OuterXMLParser()
-    
-    for chunk in chunks:
-        for event_type, data in parser.parse_chunk(chunk):
-            event_handler.handle_event(event_type, data)
+
+    if type(event_handler).handle_event is OuterXMLEventHandler.handle_event:
+        # 未重写 handle_event 时按事件类型直接调用处理方法，省去每个事件经过 handle_event 的一层调用
+        dispatch = handler_dispatch_table(event_handler)
+        for event_type, data in parser.parse_chunks(chunks):
+            dispatch[event_type](data)
+    else:
+        on_event = event_handler.handle_event
+        for event_type, data in parser.parse_chunks(chunks):
+            on_event(event_type, data)
     
     # 处理剩余内容
     for event_type, data in parser.finalize():
@@ -10,8 +10,14 @@
 
 import re
 from enum import Enum
-from typing import Generator, Tuple, Optional
-from src.common.xml_events import XMLEventType
+from typing import Generator, List, Tuple, Union
+from src.common.chunk_buffer import ChunkBuffer
+from src.common.xml_events import XMLEventType, EVENT_HANDLER_NAMES, handler_dispatch_table
+from src.common.xml_scan import extract_tag_name
+
+
+# 标签外的词法单元：文本、完整的起始/结束标签、以及尚未闭合的 '<'
+_TOKEN_RE = re.compile(r'([^<]+)|<(/?)([^>]*)>|<')
 
 
 class ParserState(Enum):
@@ -21,24 +27,25 @@ class ParserState(Enum):
     IN_END_TAG = "in_end_tag"        # 在结束标签内
 
 
-class StreamingXMLParser:
+class StreamingXMLParser(ChunkBuffer):
     """流式XML解析器"""
 
+    __slots__ = ('state',)
+
     def __init__(self):
         self.reset()
 
     def reset(self):
         """重置解析器状态"""
         self.state = ParserState.CONTENT
-        self.buffer = ""  # 缓冲区，存储所有输入
-        self.position = 0  # 当前处理位置
+        self._reset_buffer()  # 尚未处理的输入片段及读取偏移
         
-    def parse_chunk(self, chunk: str) -> Generator[Tuple[str, str], None, None]:
+    def parse_chunk(self, chunk: Union[str, bytes]) -> Generator[Tuple[str, str], None, None]:
         """
         解析一个文本块，产生事件
 
         Args:
-            chunk: 输入的文本块
+            chunk: 输入的文本块（str 或UTF-8编码的 bytes）
 
         Yields:
             Tuple[str, str]: (事件类型, 数据)
@@ -46,117 +53,147 @@ class StreamingXMLParser:
         if not chunk:
             return
 
-        # 将新的chunk添加到缓冲区
-        self.buffer += chunk
-
-        # 处理缓冲区中的内容
-        while self.position < len(self.buffer):
-            if self.state == ParserState.CONTENT:
-                # 寻找下一个标签开始
-                lt_pos = self.buffer.find('<', self.position)
-
-                if lt_pos == -1:
-                    # 没有找到标签，输出剩余内容
-                    if self.position < len(self.buffer):
-                        content = self.buffer[self.position:]
-                        if content:
-                            yield (XMLEventType.CONTENT, content)
-                        self.position = len(self.buffer)
+        # 将新的chunk追加为片段，避免每次拼接整个缓冲区
+        self._feed(chunk)
+
+        if self.state is not ParserState.CONTENT and self._tail_lacks('>'):
+            # 标签仍未闭合，缓冲区其余部分已确认不含 '>'
+            return
+
+        # 循环中反复使用的属性和方法先绑定为局部变量；
+        # 状态在循环内只读写局部变量，退出时（包括生成器被提前关闭时）写回
+        peek = self._peek
+        advance = self._advance
+        finditer = _TOKEN_RE.finditer
+        state = self.state
+
+        try:
+            # 处理缓冲区中的内容
+            while self._total_len:
+                buffer, pos = peek()
+
+                if state is ParserState.CONTENT:
+                    # 长内容按小chunk流入时，大多数chunk是不含 '<' 的纯文本：
+                    # 一次 find 确认后整段输出，不进入正则
+                    if buffer.find('<', pos) == -1:
+                        advance(len(buffer) - pos)
+                        yield (XMLEventType.CONTENT, buffer[pos:])
+                        break
+
+                    # 用预编译的词法正则在C层一次扫描文本和完整标签。已处理到的位置记在 done 中，
+                    # 扫描结束时一次性前进；生成器在产生事件时被关闭也会前进到当前标记之后
+                    done = pos
+                    try:
+                        for match in finditer(buffer, pos):
+                            done = match.end()
+                            kind = match.lastindex
+
+                            if kind == 1:
+                                # 标签间的文本内容
+                                yield (XMLEventType.CONTENT, match.group(1))
+                            elif kind == 3:
+                                # 完整的起始或结束标签
+                                tag_name = extract_tag_name(match.group(3))
+                                if tag_name:
+                                    if match.group(2):
+                                        yield (XMLEventType.END_TAG, tag_name)
+                                    else:
+                                        yield (XMLEventType.START_TAG, tag_name)
+                            else:
+                                # 标签未完整（其后没有 '>'），检查是否是结束标签
+                                lt_pos = match.start()
+                                if lt_pos + 1 < len(buffer) and buffer[lt_pos + 1] == '/':
+                                    # 结束标签
+                                    state = ParserState.IN_END_TAG
+                                    done = lt_pos + 2  # 跳过 '</'
+                                elif lt_pos + 1 < len(buffer):
+                                    # 开始标签
+                                    state = ParserState.IN_START_TAG
+                                    done = lt_pos + 1  # 跳过 '<'
+                                else:
+                                    # 缓冲区在 '<' 处结束，保留它等待更多数据
+                                    done = lt_pos
+                                return
+
+                        # 缓冲区已全部消费
+                        done = len(buffer)
+                    finally:
+                        advance(done - pos)
                     break
-                else:
-                    # 找到标签开始，先输出之前的内容
-                    if lt_pos > self.position:
-                        content = self.buffer[self.position:lt_pos]
-                        if content:
-                            yield (XMLEventType.CONTENT, content)
-
-                    # 检查是否是结束标签
-                    if lt_pos + 1 < len(self.buffer) and self.buffer[lt_pos + 1] == '/':
-                        # 结束标签
-                        self.state = ParserState.IN_END_TAG
-                        self.position = lt_pos + 2  # 跳过 '</'
-                    elif lt_pos + 1 < len(self.buffer):
-                        # 开始标签
-                        self.state = ParserState.IN_START_TAG
-                        self.position = lt_pos + 1  # 跳过 '<'
+
+                elif state is ParserState.IN_START_TAG:
+                    # 寻找标签结束
+                    gt_pos = buffer.find('>', pos)
+
+                    if gt_pos == -1:
+                        # 标签未完整，等待更多数据
+                        break
                     else:
-                        # 缓冲区结束，等待更多数据
+                        # 找到完整标签
+                        advance(gt_pos + 1 - pos)
+                        state = ParserState.CONTENT
+
+                        tag_name = extract_tag_name(buffer[pos:gt_pos])
+                        if tag_name:
+                            yield (XMLEventType.START_TAG, tag_name)
+
+                elif state is ParserState.IN_END_TAG:
+                    # 寻找标签结束
+                    gt_pos = buffer.find('>', pos)
+
+                    if gt_pos == -1:
+                        # 标签未完整，等待更多数据
                         break
+                    else:
+                        # 找到完整标签
+                        advance(gt_pos + 1 - pos)
+                        state = ParserState.CONTENT
 
-            elif self.state == ParserState.IN_START_TAG:
-                # 寻找标签结束
-                gt_pos = self.buffer.find('>', self.position)
+                        tag_name = extract_tag_name(buffer[pos:gt_pos])
+                        if tag_name:
+                            yield (XMLEventType.END_TAG, tag_name)
+        finally:
+            self.state = state
 
-                if gt_pos == -1:
-                    # 标签未完整，等待更多数据
-                    break
-                else:
-                    # 找到完整标签
-                    tag_content = self.buffer[self.position:gt_pos]
-                    tag_name = self._extract_tag_name(tag_content)
-                    if tag_name:
-                        yield (XMLEventType.START_TAG, tag_name)
-
-                    self.position = gt_pos + 1
-                    self.state = ParserState.CONTENT
-
-            elif self.state == ParserState.IN_END_TAG:
-                # 寻找标签结束
-                gt_pos = self.buffer.find('>', self.position)
-
-                if gt_pos == -1:
-                    # 标签未完整，等待更多数据
-                    break
-                else:
-                    # 找到完整标签
-                    tag_content = self.buffer[self.position:gt_pos]
-                    tag_name = self._extract_tag_name(tag_content)
-                    if tag_name:
-                        yield (XMLEventType.END_TAG, tag_name)
-
-                    self.position = gt_pos + 1
-                    self.state = ParserState.CONTENT
-
-        # 清理已处理的缓冲区内容（保留未处理的部分）
-        if self.position > 0:
-            self.buffer = self.buffer[self.position:]
-            self.position = 0
-    
+    def feed(self, data: Union[str, bytes]) -> List[Tuple[str, str]]:
+        """
+        推送式接口：输入一段数据，返回这段数据能够确定的全部事件
 
-    
+        与 llhttp 等推送式解析器一样，事件可能跨多次 feed 分段产生：
+        被截断的标签要等后续数据到达才会输出，内容也可能拆成多个CONTENT事件。
+        已消费的输入会被及时丢弃，缓冲区只保留尚未确定的尾部；流结束时调用 finalize 取得剩余事件。
 
+        Args:
+            data: 输入数据（str 或UTF-8编码的 bytes）
+
+        Returns:
+            List[Tuple[str, str]]: 本次产生的事件
+        """
+        return list(self.parse_chunk(data))
 
-    def _extract_tag_name(self, tag_content: str) -> Optional[str]:
-        """从标签内容中提取标签名"""
-        if not tag_content:
-            return None
-            
-        # 移除前后空白
-        tag_content = tag_content.strip()
-        
-        # 提取标签名（第一个单词）
-        match = re.match(r'^([a-zA-Z_][a-zA-Z0-9_-]*)', tag_content)
-        if match:
-            return match.group(1)
-        
-        return None
-    
     def finalize(self) -> Generator[Tuple[str, str], None, None]:
         """
         完成解析，输出剩余的内容
 
         Yields:
             Tuple[str, str]: 剩余的内容事件
+
+        Raises:
+            UnicodeDecodeError: 字节输入的末尾是不完整的UTF-8字符
         """
+        self._flush_decoder()
+
+        events: List[Tuple[str, str]] = []
+
         # 如果还有未处理的内容且处于内容状态，输出它
-        if self.state == ParserState.CONTENT and self.position < len(self.buffer):
-            remaining_content = self.buffer[self.position:]
-            if remaining_content:
-                yield (XMLEventType.CONTENT, remaining_content)
+        if self.state == ParserState.CONTENT and self._total_len:
+            buffer, pos = self._peek()
+            events.append((XMLEventType.CONTENT, buffer[pos:]))
 
-        # 重置状态
-        self.buffer = ""
-        self.position = 0
+        # 先重置解析状态（包括状态机状态）再输出事件，解析器可以直接用于下一个流
+        self.reset()
+
+        yield from events
 
 
 class XMLEventHandler:
@@ -174,14 +211,11 @@ class XMLEventHandler:
         """处理内容事件"""
         pass
     
-    def handle_event(self, event_type: str, data: str):
-        """处理事件的统一入口"""
-        if event_type == 'START_TAG':
-            self.on_start_tag(data)
-        elif event_type == 'END_TAG':
-            self.on_end_tag(data)
-        elif event_type == 'CONTENT':
-            self.on_content(data)
+    def handle_event(self, event_type: Union[str, int], data: str):
+        """处理事件的统一入口，event_type 可以是事件类型或整数事件码"""
+        method_name = EVENT_HANDLER_NAMES.get(event_type)
+        if method_name is not None:
+            getattr(self, method_name)(data)
 
 
 def parse_stream(chunks, event_handler: XMLEventHandler):
@@ -193,10 +227,18 @@ def parse_stream(chunks, event_handler: XMLEventHandler):
         event_handler: 事件处理器
     """
     parser = StreamingXMLParser()
-    
-    for chunk in chunks:
-        for event_type, data in parser.parse_chunk(chunk):
-            event_handler.handle_event(event_type, data)
+
+    if type(event_handler).handle_event is XMLEventHandler.handle_event:
+        # 未重写 handle_event 时按事件类型直接调用处理方法，省去每个事件经过 handle_event 的一层调用
+        dispatch = handler_dispatch_table(event_handler)
+        for chunk in chunks:
+            for event_type, data in parser.parse_chunk(chunk):
+                dispatch[event_type](data)
+    else:
+        handle_event = event_handler.handle_event
+        for chunk in chunks:
+            for event_type, data in parser.parse_chunk(chunk):
+                handle_event(event_type, data)
     
     # 处理剩余内容
     for event_type, data in parser.finalize():
@@ -5,95 +5,128 @@
 智能识别真正的标签和内容
 """
 
+import io
+from typing import Optional, TextIO
 from src.dynamic_tree_parser import DynamicTreeParser, DynamicTreeEventHandler
+from verbose_output import demo_output, indentation
+
+log, write = demo_output.log, demo_output.write
+
+
+# 各事件类型的显示标签，一次字典查找代替逐个比较事件类型
+_EVENT_LABELS = {
+    'START_TAG': '🏷️  开始标签',
+    'END_TAG': '🏁 结束标签',
+    'CONTENT': '📝 内容',
+}
+
+# 详细流式演示中各事件类型的输出格式：标签名直接显示，内容显示 repr
+_DETAILED_EVENT_FORMATS = {
+    'START_TAG': "  🏷️  开始标签: {data} (level {level})",
+    'END_TAG': "  🏁 结束标签: {data} (level {level})",
+    'CONTENT': "  📝 内容: {data!r} (level {level})",
+}
+
+
+def iter_chunks(text: str, chunk_size: int):
+    """按固定大小惰性切分文本，模拟网络传输，不预先构建整个chunk列表"""
+    for i in range(0, len(text), chunk_size):
+        yield text[i:i + chunk_size]
 
 
 class DynamicTreeHandler(DynamicTreeEventHandler):
     """动态树形解析器事件处理器"""
     
-    def __init__(self):
-        self.tag_stack = []
-        self.content_buffer = {}
+    def __init__(self, file: Optional[TextIO] = None):
+        """
+        Args:
+            file: 输出目标，默认为当前的 sys.stdout；可以传入 io.StringIO 等缓冲对象批量收集输出
+        """
+        self.file: Optional[TextIO] = file
+        self.tag_stack: list[str] = []  # 层级即栈深度，只需记录标签名
+        self.content_buffer: dict[str, list[str]] = {}  # 内容片段先收集，结束标签时再拼接
         
     def on_start_tag(self, tag_name: str, level: int):
-        indent = "  " * level
-        print(f"{indent}🏷️  开始标签: {tag_name} (level {level})")
-        self.tag_stack.append((tag_name, level))
-        self.content_buffer[tag_name] = ""
+        indent = indentation(level)
+        log(f"{indent}🏷️  开始标签: {tag_name} (level {level})", file=self.file)
+        self.tag_stack.append(tag_name)
+        self.content_buffer[tag_name] = []
         
     def on_end_tag(self, tag_name: str, level: int):
-        indent = "  " * level
-        print(f"{indent}🏁 结束标签: {tag_name} (level {level})")
-        if self.tag_stack and self.tag_stack[-1][0] == tag_name:
+        indent = indentation(level)
+        log(f"{indent}🏁 结束标签: {tag_name} (level {level})", file=self.file)
+        if self.tag_stack and self.tag_stack[-1] == tag_name:
             self.tag_stack.pop()
         
-        if tag_name in self.content_buffer and self.content_buffer[tag_name].strip():
-            print(f"{indent}📝 {tag_name} 内容: {self.content_buffer[tag_name].strip()}")
+        text = "".join(self.content_buffer.get(tag_name, ())).strip()
+        if text:
+            log(f"{indent}📝 {tag_name} 内容: {text}", file=self.file)
         
     def on_content(self, content: str, level: int):
-        if content.strip():
-            indent = "  " * level
-            print(f"{indent}📄 内容 (level {level}): {repr(content)}")
-            
-            # 记录到当前标签的内容缓冲区
-            if self.tag_stack:
-                current_tag = self.tag_stack[-1][0]
-                self.content_buffer[current_tag] += content
+        if not content.strip():
+            return
+
+        indent = indentation(level)
+        log(f"{indent}📄 内容 (level {level}): {content!r}", file=self.file)
+
+        # 记录到当前标签的内容缓冲区
+        if self.tag_stack:
+            current_tag = self.tag_stack[-1]
+            self.content_buffer[current_tag].append(content)
 
 
 def example_basic_streaming():
     """基本流式处理示例"""
-    print("=" * 80)
-    print("动态树形解析器基本流式处理示例")
-    print("=" * 80)
+    log("=" * 80)
+    log("动态树形解析器基本流式处理示例")
+    log("=" * 80)
 
     hierarchy = {"Action": ["ToolName", "Description"]}
     parser = DynamicTreeParser(hierarchy)
 
-    print("标签层次结构:")
-    print(parser.get_tag_hierarchy_info())
+    log("标签层次结构:")
+    log(parser.get_tag_hierarchy_info())
 
     # 模拟流式输入
     test_xml = "<Action><ToolName>image_gen</ToolName><Description>服务描述</Description></Action>"
-    chunks = []
     chunk_size = 10
 
-    for i in range(0, len(test_xml), chunk_size):
-        chunks.append(test_xml[i:i + chunk_size])
+    log(f"完整输入: {test_xml}")
+    log(f"分块大小: {chunk_size}")
+    log()
 
-    print(f"完整输入: {test_xml}")
-    print(f"分块大小: {chunk_size}")
-    print()
-
-    for i, chunk in enumerate(chunks):
-        print(f"📥 接收到chunk {i}: {repr(chunk)}")
+    for i, chunk in enumerate(iter_chunks(test_xml, chunk_size)):
+        # 每个chunk的输出先收集起来，最后一次性写出
+        lines = [f"📥 接收到chunk {i}: {chunk!r}"]
 
         for event_type, data, level in parser.parse_chunk(chunk):
-            print(f"🎯 事件: {event_type} -> {repr(data)} (level {level})")
+            lines.append(f"🎯 事件: {event_type} -> {data!r} (level {level})")
 
-        print("-" * 40)
+        lines.append("-" * 40)
+        write("\n".join(lines))
+        write("\n")
 
     # 处理剩余内容
     for event_type, data, level in parser.finalize():
-        print(f"🎯 最终事件: {event_type} -> {repr(data)} (level {level})")
+        log(f"🎯 最终事件: {event_type} -> {data!r} (level {level})")
 
 
 def example_case_1():
     """示例1：缺少预期的子标签"""
-    print("=" * 80)
-    print("示例1：缺少预期的子标签")
-    print("=" * 80)
+    log("=" * 80)
+    log("示例1：缺少预期的子标签")
+    log("=" * 80)
     
     # 解析器知道 Action -> ToolName，但文本中没有ToolName
     hierarchy = {"Action": ["ToolName"]}
     parser = DynamicTreeParser(hierarchy)
     
-    print("标签层次结构:")
-    print(parser.get_tag_hierarchy_info())
+    log("标签层次结构:")
+    log(parser.get_tag_hierarchy_info())
     
     text = "<Action><Description><Feature>通义万相是一个图像生成服务，输入文本描述，可以得到图片的URL</Feature></Description></Action>"
-    print(f"输入文本: {text}")
-    print("\n解析结果:")
+    log(f"输入文本: {text}")
+    log("\n解析结果:")
     
     handler = DynamicTreeHandler()
     for event_type, data, level in parser.parse_chunk(text):
@@ -101,25 +134,25 @@ def example_case_1():
     for event_type, data, level in parser.finalize():
         handler.handle_event(event_type, data, level)
     
-    print("\n结论: 只识别了Action标签，Description和Feature被当作内容处理")
+    log("\n结论: 只识别了Action标签，Description和Feature被当作内容处理")
 
 
 def example_case_2():
     """示例2：内容中的伪标签"""
-    print("\n" + "=" * 80)
-    print("示例2：内容中的伪标签")
-    print("=" * 80)
+    log("\n" + "=" * 80)
+    log("示例2：内容中的伪标签")
+    log("=" * 80)
     
     # 解析器知道 Action -> Feature，但Feature出现在错误位置
     hierarchy = {"Action": ["Feature"]}
     parser = DynamicTreeParser(hierarchy)
     
-    print("标签层次结构:")
-    print(parser.get_tag_hierarchy_info())
+    log("标签层次结构:")
+    log(parser.get_tag_hierarchy_info())
     
     text = "<Action><ToolName>image_gen</ToolName><Description><Feature>通义万相是一个图像生成服务，输入文本描述，可以得到图片的URL</Feature></Description></Action>"
-    print(f"输入文本: {text}")
-    print("\n解析结果:")
+    log(f"输入文本: {text}")
+    log("\n解析结果:")
     
     handler = DynamicTreeHandler()
     for event_type, data, level in parser.parse_chunk(text):
@@ -127,14 +160,14 @@ def example_case_2():
     for event_type, data, level in parser.finalize():
         handler.handle_event(event_type, data, level)
     
-    print("\n结论: 只识别了Action标签，Feature虽然在层次结构中，但位置不对，被当作内容处理")
+    log("\n结论: 只识别了Action标签，Feature虽然在层次结构中，但位置不对，被当作内容处理")
 
 
 def example_case_3():
     """示例3：正确的层次结构"""
-    print("\n" + "=" * 80)
-    print("示例3：正确的层次结构")
-    print("=" * 80)
+    log("\n" + "=" * 80)
+    log("示例3：正确的层次结构")
+    log("=" * 80)
     
     # 完整的层次结构
     hierarchy = {
@@ -143,12 +176,12 @@ def example_case_3():
     }
     parser = DynamicTreeParser(hierarchy)
     
-    print("标签层次结构:")
-    print(parser.get_tag_hierarchy_info())
+    log("标签层次结构:")
+    log(parser.get_tag_hierarchy_info())
     
     text = "<Action><ToolName>image_gen</ToolName><Description><Feature>通义万相是一个图像生成服务，输入文本描述，可以得到图片的URL</Feature></Description></Action>"
-    print(f"输入文本: {text}")
-    print("\n解析结果:")
+    log(f"输入文本: {text}")
+    log("\n解析结果:")
     
     handler = DynamicTreeHandler()
     for event_type, data, level in parser.parse_chunk(text):
@@ -156,14 +189,14 @@ def example_case_3():
     for event_type, data, level in parser.finalize():
         handler.handle_event(event_type, data, level)
     
-    print("\n结论: 所有标签都在正确位置，全部被识别")
+    log("\n结论: 所有标签都在正确位置，全部被识别")
 
 
 def example_case_4():
     """示例4：复杂的流式处理"""
-    print("\n" + "=" * 80)
-    print("示例4：复杂的流式处理")
-    print("=" * 80)
+    log("\n" + "=" * 80)
+    log("示例4：复杂的流式处理")
+    log("=" * 80)
 
     hierarchy = {
         "Action": ["ToolName", "Description"],
@@ -171,8 +204,8 @@ def example_case_4():
     }
     parser = DynamicTreeParser(hierarchy)
 
-    print("标签层次结构:")
-    print(parser.get_tag_hierarchy_info())
+    log("标签层次结构:")
+    log(parser.get_tag_hierarchy_info())
 
     # 模拟流式输入
     chunks = [
@@ -182,47 +215,42 @@ def example_case_4():
         "ription></Action>"
     ]
 
-    print("流式输入chunks:")
+    log("流式输入chunks:")
     for i, chunk in enumerate(chunks):
-        print(f"  Chunk {i}: {repr(chunk)}")
+        log(f"  Chunk {i}: {chunk!r}")
 
-    print("\n流式解析过程:")
+    log("\n流式解析过程:")
     for i, chunk in enumerate(chunks):
-        print(f"📥 接收到chunk {i}: {repr(chunk)}")
+        # 每个chunk的输出先收集起来，最后一次性写出
+        lines = [f"📥 接收到chunk {i}: {chunk!r}"]
 
-        events_in_chunk = []
-        for event_type, data, level in parser.parse_chunk(chunk):
-            events_in_chunk.append((event_type, data, level))
+        events_in_chunk = list(parser.parse_chunk(chunk))
 
         if events_in_chunk:
             for event_type, data, level in events_in_chunk:
-                indent = "  " * level
-                if event_type == 'START_TAG':
-                    print(f"  🎯 事件: START_TAG -> {repr(data)} (level {level})")
-                elif event_type == 'END_TAG':
-                    print(f"  🎯 事件: END_TAG -> {repr(data)} (level {level})")
-                elif event_type == 'CONTENT':
-                    print(f"  🎯 事件: CONTENT -> {repr(data)} (level {level})")
+                lines.append(f"  🎯 事件: {event_type} -> {data!r} (level {level})")
         else:
-            print("  (本chunk未产生事件)")
+            lines.append("  (本chunk未产生事件)")
 
-        print("-" * 40)
+        lines.append("-" * 40)
+        write("\n".join(lines))
+        write("\n")
 
     # 处理剩余内容
     final_events = list(parser.finalize())
     if final_events:
-        print("🔚 处理剩余内容:")
+        log("🔚 处理剩余内容:")
         for event_type, data, level in final_events:
-            print(f"  🎯 最终事件: {event_type} -> {repr(data)} (level {level})")
+            log(f"  🎯 最终事件: {event_type} -> {data!r} (level {level})")
 
-    print("\n结论: Feature和Usage被识别为标签，Other不在层次结构中被当作内容")
+    log("\n结论: Feature和Usage被识别为标签，Other不在层次结构中被当作内容")
 
 
 def example_case_5():
     """示例5：多根节点的层次结构"""
-    print("\n" + "=" * 80)
-    print("示例5：多根节点的层次结构")
-    print("=" * 80)
+    log("\n" + "=" * 80)
+    log("示例5：多根节点的层次结构")
+    log("=" * 80)
     
     hierarchy = {
         "Action": ["ToolName"],
@@ -231,12 +259,12 @@ def example_case_5():
     }
     parser = DynamicTreeParser(hierarchy)
     
-    print("标签层次结构:")
-    print(parser.get_tag_hierarchy_info())
+    log("标签层次结构:")
+    log(parser.get_tag_hierarchy_info())
     
     text = "<Thought><Content>我需要调用工具</Content></Thought><Action><ToolName>image_gen</ToolName></Action><Response><Message>完成</Message></Response>"
-    print(f"输入文本: {text}")
-    print("\n解析结果:")
+    log(f"输入文本: {text}")
+    log("\n解析结果:")
     
     handler = DynamicTreeHandler()
     for event_type, data, level in parser.parse_chunk(text):
@@ -244,76 +272,78 @@ def example_case_5():
     for event_type, data, level in parser.finalize():
         handler.handle_event(event_type, data, level)
     
-    print("\n结论: 多个根节点都能正确识别")
+    log("\n结论: 多个根节点都能正确识别")
 
 
 def example_streaming_detailed():
     """示例：详细的流式处理演示"""
-    print("\n" + "=" * 80)
-    print("详细流式处理演示")
-    print("=" * 80)
+    log("\n" + "=" * 80)
+    log("详细流式处理演示")
+    log("=" * 80)
 
     hierarchy = {"Action": ["ToolName", "Description"]}
     parser = DynamicTreeParser(hierarchy)
 
-    print("标签层次结构:")
-    print(parser.get_tag_hierarchy_info())
+    log("标签层次结构:")
+    log(parser.get_tag_hierarchy_info())
 
     # 模拟LLM的流式输出
     llm_output = "<Action><ToolName>image_gen</ToolName><Description>通义万相是一个图像生成服务，输入文本描述，可以得到图片的URL</Description></Action>"
 
-    print(f"完整输入: {llm_output}")
-    print()
+    log(f"完整输入: {llm_output}")
+    log()
 
     # 分块处理，每次15个字符
     chunk_size = 15
-    print(f"📥 开始流式解析，chunk大小: {chunk_size}")
-    print("-" * 50)
+    log(f"📥 开始流式解析，chunk大小: {chunk_size}")
+    log("-" * 50)
 
     for i in range(0, len(llm_output), chunk_size):
         chunk = llm_output[i:i + chunk_size]
-        print(f"📦 处理chunk {i//chunk_size}: {repr(chunk)}")
+        # 每个chunk的输出先收集起来，最后一次性写出
+        lines = [f"📦 处理chunk {i//chunk_size}: {chunk!r}"]
 
         # 解析chunk并处理事件
-        events_in_chunk = []
-        for event_type, data, level in parser.parse_chunk(chunk):
-            events_in_chunk.append((event_type, data, level))
+        events_in_chunk = list(parser.parse_chunk(chunk))
 
         if events_in_chunk:
             for event_type, data, level in events_in_chunk:
-                if event_type == 'START_TAG':
-                    print(f"  🏷️  开始标签: {data} (level {level})")
-                elif event_type == 'END_TAG':
-                    print(f"  🏁 结束标签: {data} (level {level})")
-                elif event_type == 'CONTENT':
-                    print(f"  📝 内容: {repr(data)} (level {level})")
+                lines.append(_DETAILED_EVENT_FORMATS[event_type].format(data=data, level=level))
         else:
-            print("  (本chunk未产生事件，等待更多数据)")
+            lines.append("  (本chunk未产生事件，等待更多数据)")
 
-        print()
+        lines.append("")
+        write("\n".join(lines))
+        write("\n")
 
     # 处理剩余内容
     final_events = list(parser.finalize())
     if final_events:
-        print("🔚 处理剩余内容:")
+        log("🔚 处理剩余内容:")
         for event_type, data, level in final_events:
             if event_type == 'CONTENT':
-                print(f"  📝 最终内容: {repr(data)} (level {level})")
+                log(f"  📝 最终内容: {data!r} (level {level})")
 
-    print("✅ 流式解析完成!")
+    log("✅ 流式解析完成!")
 
 
-def example_long_content_streaming():
-    """示例：长内容的流式处理"""
-    print("\n" + "=" * 80)
-    print("长内容流式处理演示")
-    print("=" * 80)
+def example_long_content_streaming(verbose: bool = False):
+    """
+    示例：长内容的流式处理
+
+    Args:
+        verbose: 是否逐chunk打印事件。默认关闭，只输出统计信息，
+                 此时不做任何格式化，耗时基本都花在解析上
+    """
+    log("\n" + "=" * 80)
+    log("长内容流式处理演示")
+    log("=" * 80)
 
     hierarchy = {"Action": ["ToolName", "Description"], "Description": ["Feature"]}
     parser = DynamicTreeParser(hierarchy)
 
-    print("标签层次结构:")
-    print(parser.get_tag_hierarchy_info())
+    log("标签层次结构:")
+    log(parser.get_tag_hierarchy_info())
 
     # 构建包含长内容的XML
     long_description = """通义万相是阿里巴巴达摩院推出的AI绘画创作大模型，能够根据用户输入的文本描述生成相应的图像。
@@ -352,34 +382,38 @@ def example_long_content_streaming():
 
     # 分块处理，模拟网络传输
     chunk_size = 10  # 每次200字符
-    chunks = []
-    for i in range(0, len(full_xml), chunk_size):
-        chunks.append(full_xml[i:i + chunk_size])
     content_chunks = []  # 收集所有内容块
-    for i, chunk in enumerate(chunks):
-        print(f"📦 处理chunk {repr(chunk)}")
-        chunk_events = []
+    chunk_count = 0
+    event_count = 0
+    buf = io.StringIO()  # 详细输出先写入内存，解析结束后一次性写出
+    for i, chunk in enumerate(iter_chunks(full_xml, chunk_size)):
+        chunk_count += 1
+        if not verbose:
+            for _ in parser.parse_chunk(chunk):
+                event_count += 1
+            continue
+
+        buf.write(f"📦 处理chunk {chunk!r}\n")
         for event_type, data, level in parser.parse_chunk(chunk):
-            chunk_events.append((event_type, data, level))
-            if event_type == 'START_TAG':
-                print(f"   🏷️  开始标签: {repr(data)} (level {level})")
-            elif event_type == 'END_TAG':
-                print(f"   🏁 结束标签: {repr(data)} (level {level})")
-            elif event_type == 'CONTENT':
-                print(f"   📝 内容: {repr(data)} (level {level})")
+            event_count += 1
+            buf.write(f"   {_EVENT_LABELS[event_type]}: {data!r} (level {level})\n")
+
+    write(buf.getvalue())
+    event_count += sum(1 for _ in parser.finalize())
+    log(f"✅ 共处理 {chunk_count} 个chunk，产生 {event_count} 个事件")
 
 
 def example_robustness_test():
     """示例6：鲁棒性测试"""
-    print("\n" + "=" * 80)
-    print("示例6：鲁棒性测试")
-    print("=" * 80)
+    log("\n" + "=" * 80)
+    log("示例6：鲁棒性测试")
+    log("=" * 80)
     
     hierarchy = {"Action": ["ToolName", "Description"]}
     parser = DynamicTreeParser(hierarchy)
     
-    print("标签层次结构:")
-    print(parser.get_tag_hierarchy_info())
+    log("标签层次结构:")
+    log(parser.get_tag_hierarchy_info())
     
     # 测试各种边界情况
     test_cases = [
@@ -391,8 +425,8 @@ def example_robustness_test():
     ]
     
     for i, text in enumerate(test_cases, 1):
-        print(f"\n测试用例 {i}: {text}")
-        print("解析结果:")
+        log(f"\n测试用例 {i}: {text}")
+        log("解析结果:")
         
         parser.reset()  # 重置解析器
         handler = DynamicTreeHandler()
@@ -411,5 +445,5 @@ if __name__ == "__main__":
     # example_case_4()
     # example_case_5()
     # example_streaming_detailed()
-    example_long_content_streaming()
+    example_long_content_streaming(verbose=True)
     # example_robustness_test()
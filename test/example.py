@@ -4,37 +4,59 @@
 演示如何使用StreamingXMLParser处理LLM的流式输出
 """
 
+import sys
+from src.common.xml_scan import NONSPACE_RE
 from src.streaming_xml_parser import StreamingXMLParser, XMLEventHandler, parse_stream
+from verbose_output import indentation
 
 
 class LLMOutputHandler(XMLEventHandler):
     """处理LLM输出的事件处理器"""
     
     def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """清空处理状态，使处理器可以复用于下一个数据流"""
         self.current_state = None
-        self.content_buffer = ""
+        self.content_buffer: list[str] = []  # 内容片段先收集，离开状态时再拼接
         
     def on_start_tag(self, tag_name: str):
         print(f"🏷️  进入状态: {tag_name}")
         self.current_state = tag_name
-        self.content_buffer = ""
+        self.content_buffer.clear()
         
     def on_end_tag(self, tag_name: str):
         print(f"🏁 离开状态: {tag_name}")
-        if self.content_buffer.strip():
-            print(f"📝 {tag_name} 完整内容: {self.content_buffer.strip()}")
+        text = "".join(self.content_buffer).strip()
+        if text:
+            print(f"📝 {tag_name} 完整内容: {text}")
         self.current_state = None
-        self.content_buffer = ""
+        self.content_buffer.clear()
         
     def on_content(self, content: str):
         if content.strip():  # 只处理非空内容
-            print(f"📄 内容块 ({self.current_state or 'ROOT'}): {repr(content)}")
-            self.content_buffer += content
+            print(f"📄 内容块 ({self.current_state or 'ROOT'}): {content!r}")
+            self.content_buffer.append(content)
 
 
-def simulate_llm_stream():
-    """模拟LLM的流式输出"""
-    llm_output = """<UserInput><Content>现在给我画个五彩斑斓的黑</Content></UserInput>
+# 可复用的处理器池：反复运行示例（例如在基准测试中）时不必每次重新构造处理器
+_HANDLER_POOL: list[LLMOutputHandler] = []
+
+
+def _acquire_handler() -> LLMOutputHandler:
+    """从池中取出一个处理器，池为空时新建"""
+    return _HANDLER_POOL.pop() if _HANDLER_POOL else LLMOutputHandler()
+
+
+def _release_handler(handler: LLMOutputHandler):
+    """重置处理器并放回池中"""
+    handler.reset()
+    _HANDLER_POOL.append(handler)
+
+
+# 模拟的LLM完整输出，模块级常量，多次运行示例时共享同一个字符串对象
+LLM_OUTPUT = """<UserInput><Content>现在给我画个五彩斑斓的黑</Content></UserInput>
 
 <Start><Reason>UserInput</Reason></Start>
 
@@ -63,29 +85,48 @@ def simulate_llm_stream():
 <FinalAnswer><Content>很高兴听到您说很满意，如果还有什么需要我帮助的欢迎向我询问！</Content></FinalAnswer>
 
 <End><Reason>FinalAnswer</Reason></End>"""
-    
+
+
+def simulate_llm_stream():
+    """模拟LLM的流式输出"""
     # 模拟流式输出，每次输出几个字符
     chunk_size = 5
-    for i in range(0, len(llm_output), chunk_size):
-        chunk = llm_output[i:i + chunk_size]
+    for i in range(0, len(LLM_OUTPUT), chunk_size):
+        chunk = LLM_OUTPUT[i:i + chunk_size]
         yield chunk
         # time.sleep(0.1)  # 模拟网络延迟
 
 
+def simulate_llm_stream_bytes():
+    """
+    模拟来自网络的LLM字节流输出
+
+    整段输出只编码一次，之后按固定字节数产生 memoryview 切片，不复制数据；
+    多字节字符可能被切片截断，由解析器增量解码处理
+    """
+    data = memoryview(LLM_OUTPUT.encode('utf-8'))
+    chunk_size = 5
+    for i in range(0, len(data), chunk_size):
+        yield data[i:i + chunk_size]
+
+
 def example_basic_usage():
     parser = StreamingXMLParser()
     
     for chunk in simulate_llm_stream():
-        print(f"📥 接收到chunk: {repr(chunk)}")
+        # 每个chunk的输出先收集起来，最后一次性写出
+        lines = [f"📥 接收到chunk: {chunk!r}"]
         
         for event_type, data in parser.parse_chunk(chunk):
-            print(f"🎯 事件: {event_type} -> {repr(data)}")
+            lines.append(f"🎯 事件: {event_type} -> {data!r}")
         
-        print("-" * 40)
+        lines.append("-" * 40)
+        sys.stdout.write("\n".join(lines))
+        sys.stdout.write("\n")
     
     # 处理剩余内容
     for event_type, data in parser.finalize():
-        print(f"🎯 最终事件: {event_type} -> {repr(data)}")
+        print(f"🎯 最终事件: {event_type} -> {data!r}")
 
 
 def example_with_handler():
@@ -94,10 +135,13 @@ def example_with_handler():
     print("使用事件处理器示例")
     print("=" * 60)
     
-    handler = LLMOutputHandler()
+    handler = _acquire_handler()
     chunks = list(simulate_llm_stream())  # 转换为列表以便重用
     
-    parse_stream(chunks, handler)
+    try:
+        parse_stream(chunks, handler)
+    finally:
+        _release_handler(handler)
 
 
 def example_real_time_processing():
@@ -108,26 +152,32 @@ def example_real_time_processing():
     
     class RealTimeHandler(XMLEventHandler):
         def __init__(self):
-            self.tag_stack = []
+            self.tag_stack: list[str] = []  # 只记录标签名，深度即缩进层级
             
         def on_start_tag(self, tag_name: str):
             self.tag_stack.append(tag_name)
-            indent = "  " * (len(self.tag_stack) - 1)
+            depth = len(self.tag_stack) - 1
+            indent = indentation(depth)
             print(f"{indent}▶️ 开始 {tag_name}")
             
         def on_end_tag(self, tag_name: str):
             if self.tag_stack and self.tag_stack[-1] == tag_name:
                 self.tag_stack.pop()
-            indent = "  " * len(self.tag_stack)
+            depth = len(self.tag_stack)
+            indent = indentation(depth)
             print(f"{indent}◀️ 结束 {tag_name}")
             
         def on_content(self, content: str):
-            if content.strip():
-                indent = "  " * len(self.tag_stack)
-                # 只显示内容的前50个字符
-                display_content = content.strip()[:50]
-                if len(content.strip()) > 50:
-                    display_content += "..."
+            # 只去掉前导空白，之后只在前50个字符的窗口内处理，不为整段长内容复制 strip() 的结果
+            text = content.lstrip()
+            if text:
+                depth = len(self.tag_stack)
+                indent = indentation(depth)
+                # 只显示内容的前50个字符，第50个字符之后还有可见内容时加省略号
+                if NONSPACE_RE.search(text, 50):
+                    display_content = text[:50] + "..."
+                else:
+                    display_content = text[:50].rstrip()
                 print(f"{indent}📝 {display_content}")
     
     handler = RealTimeHandler()
@@ -4,8 +4,10 @@
 演示如何使用OuterXMLParser处理LLM的流式输出，只解析最外层标签
 """
 
+import sys
 import time
 from src.outer_xml_parser import OuterXMLParser, OuterXMLEventHandler, parse_outer_stream
+from verbose_output import indentation
 
 
 class LLMOuterHandler(OuterXMLEventHandler):
@@ -22,15 +24,16 @@ class LLMOuterHandler(OuterXMLEventHandler):
         
     def on_end_tag(self, tag_name: str):
         print(f"🏁 离开外层状态: {tag_name}")
-        if self.content_buffer.strip():
-            print(f"📝 {tag_name} 完整内容: {self.content_buffer.strip()}")
+        text = self.content_buffer.strip()
+        if text:
+            print(f"📝 {tag_name} 完整内容: {text}")
         self.current_tag = None
         self.content_buffer = ""
         
     def on_content(self, content: str):
-        if content.strip():  # 只处理非空内容
-            print(f"📄 内容块 ({self.current_tag or 'ROOT'}): {repr(content)}")
-            self.content_buffer += content
+        # 解析器不会输出纯空白内容，无需再判断
+        print(f"📄 内容块 ({self.current_tag or 'ROOT'}): {content!r}")
+        self.content_buffer += content
 
 
 def simulate_llm_outer_stream():
@@ -82,16 +85,19 @@ def example_basic_outer_usage():
     parser = OuterXMLParser()
     
     for chunk in simulate_llm_outer_stream():
-        print(f"📥 接收到chunk: {repr(chunk)}")
+        # 每个chunk的输出先收集起来，最后一次性写出
+        lines = [f"📥 接收到chunk: {chunk!r}"]
         
         for event_type, data in parser.parse_chunk(chunk):
-            print(f"🎯 事件: {event_type} -> {repr(data)}")
+            lines.append(f"🎯 事件: {event_type} -> {data!r}")
         
-        print("-" * 40)
+        lines.append("-" * 40)
+        sys.stdout.write("\n".join(lines))
+        sys.stdout.write("\n")
     
     # 处理剩余内容
     for event_type, data in parser.finalize():
-        print(f"🎯 最终事件: {event_type} -> {repr(data)}")
+        print(f"🎯 最终事件: {event_type} -> {data!r}")
 
 
 def example_with_outer_handler():
@@ -121,9 +127,9 @@ def example_comparison():
     print("🔹 外层解析器结果:")
     outer_parser = OuterXMLParser()
     for event_type, data in outer_parser.parse_chunk(test_xml):
-        print(f"  {event_type}: {repr(data)}")
+        print(f"  {event_type}: {data!r}")
     for event_type, data in outer_parser.finalize():
-        print(f"  {event_type}: {repr(data)}")
+        print(f"  {event_type}: {data!r}")
     
     print()
     
@@ -132,9 +138,9 @@ def example_comparison():
     from src.streaming_xml_parser import StreamingXMLParser
     full_parser = StreamingXMLParser()
     for event_type, data in full_parser.parse_chunk(test_xml):
-        print(f"  {event_type}: {repr(data)}")
+        print(f"  {event_type}: {data!r}")
     for event_type, data in full_parser.finalize():
-        print(f"  {event_type}: {repr(data)}")
+        print(f"  {event_type}: {data!r}")
 
 
 def example_real_time_outer_processing():
@@ -149,23 +155,26 @@ def example_real_time_outer_processing():
             
         def on_start_tag(self, tag_name: str):
             self.outer_tag_stack.append(tag_name)
-            indent = "  " * (len(self.outer_tag_stack) - 1)
+            depth = len(self.outer_tag_stack) - 1
+            indent = indentation(depth)
             print(f"{indent}▶️ 开始外层标签: {tag_name}")
             
         def on_end_tag(self, tag_name: str):
             if self.outer_tag_stack and self.outer_tag_stack[-1] == tag_name:
                 self.outer_tag_stack.pop()
-            indent = "  " * len(self.outer_tag_stack)
+            depth = len(self.outer_tag_stack)
+            indent = indentation(depth)
             print(f"{indent}◀️ 结束外层标签: {tag_name}")
             
         def on_content(self, content: str):
-            if content.strip():
-                indent = "  " * len(self.outer_tag_stack)
-                # 只显示内容的前80个字符
-                display_content = content.strip()[:80]
-                if len(content.strip()) > 80:
-                    display_content += "..."
-                print(f"{indent}📝 {display_content}")
+            text = content.strip()
+            depth = len(self.outer_tag_stack)
+            indent = indentation(depth)
+            # 只显示内容的前80个字符
+            display_content = text[:80]
+            if len(text) > 80:
+                display_content += "..."
+            print(f"{indent}📝 {display_content}")
     
     handler = RealTimeOuterHandler()
     parser = OuterXMLParser()
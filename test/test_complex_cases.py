@@ -5,7 +5,10 @@
 """
 
 import unittest
-from src.dynamic_tree_parser import DynamicTreeParser
+from src.dynamic_tree_parser import DynamicTreeParser, classify_events
+from verbose_output import test_output
+
+log, log_events = test_output.log, test_output.log_events
 
 
 class TestComplexCases(unittest.TestCase):
@@ -13,7 +16,7 @@ class TestComplexCases(unittest.TestCase):
     
     def test_deeply_nested_invalid_tags(self):
         """测试深度嵌套的无效标签"""
-        print("\n=== 测试1：深度嵌套的无效标签 ===")
+        log("\n=== 测试1：深度嵌套的无效标签 ===")
         
         hierarchy = {"Action": ["Feature"]}
         parser = DynamicTreeParser(hierarchy)
@@ -22,14 +25,11 @@ class TestComplexCases(unittest.TestCase):
         
         events = list(parser.parse_chunk(text)) + list(parser.finalize())
         
-        print(f"输入: {text}")
-        print("事件:")
-        for event in events:
-            print(f"  {event}")
+        log(f"输入: {text}")
+        log_events(events)
         
         # 应该只识别Action和最后一个Feature
-        start_tags = [e for e in events if e[0] == 'START_TAG']
-        feature_tags = [e for e in start_tags if e[1] == 'Feature']
+        feature_tags = classify_events(events)['START_TAG'].get('Feature', [])
         
         self.assertEqual(len(feature_tags), 1)  # 只有一个Feature被识别
         
@@ -48,7 +48,7 @@ class TestComplexCases(unittest.TestCase):
     
     def test_multiple_same_tags_different_positions(self):
         """测试多个相同标签在不同位置"""
-        print("\n=== 测试2：多个相同标签在不同位置 ===")
+        log("\n=== 测试2：多个相同标签在不同位置 ===")
         
         hierarchy = {"Action": ["Feature"]}
         parser = DynamicTreeParser(hierarchy)
@@ -57,20 +57,19 @@ class TestComplexCases(unittest.TestCase):
         
         events = list(parser.parse_chunk(text)) + list(parser.finalize())
         
-        print(f"输入: {text}")
-        print("事件:")
-        for event in events:
-            print(f"  {event}")
+        log(f"输入: {text}")
+        log_events(events)
         
         # 应该只识别Action和两个正确位置的Feature
-        start_tags = [e for e in events if e[0] == 'START_TAG']
-        feature_tags = [e for e in start_tags if e[1] == 'Feature']
+        classified = classify_events(events)
+        feature_tags = classified['START_TAG'].get('Feature', [])
         
         self.assertEqual(len(feature_tags), 2)  # 两个Feature被识别
+        self.assertEqual(len(classified['END_TAG'].get('Feature', [])), 2)
     
     def test_malformed_xml_resilience(self):
         """测试对格式错误XML的鲁棒性"""
-        print("\n=== 测试3：格式错误XML的鲁棒性 ===")
+        log("\n=== 测试3：格式错误XML的鲁棒性 ===")
         
         hierarchy = {"Action": ["Feature"]}
         parser = DynamicTreeParser(hierarchy)
@@ -85,27 +84,24 @@ class TestComplexCases(unittest.TestCase):
         ]
         
         for i, text in enumerate(test_cases):
-            print(f"\n子测试 3.{i+1}: {text}")
+            log(f"\n子测试 3.{i+1}: {text}")
             parser.reset()
             
             try:
                 events = list(parser.parse_chunk(text)) + list(parser.finalize())
-                print("事件:")
-                for event in events:
-                    print(f"  {event}")
+                log_events(events)
                 
                 # 验证至少能识别Action标签
-                start_tags = [e for e in events if e[0] == 'START_TAG']
-                action_tags = [e for e in start_tags if e[1] == 'Action']
+                action_tags = classify_events(events)['START_TAG'].get('Action', [])
                 self.assertGreaterEqual(len(action_tags), 1)
                 
             except Exception as e:
-                print(f"  异常: {e}")
+                log(f"  异常: {e}")
                 self.fail(f"解析器在处理格式错误XML时崩溃: {e}")
     
     def test_extreme_nesting_levels(self):
         """测试极端嵌套层级"""
-        print("\n=== 测试4：极端嵌套层级 ===")
+        log("\n=== 测试4：极端嵌套层级 ===")
         
         hierarchy = {"Action": ["Feature"], "Feature": ["SubFeature"]}
         parser = DynamicTreeParser(hierarchy)
@@ -119,24 +115,20 @@ class TestComplexCases(unittest.TestCase):
             deep_nesting += f"</Invalid{i}>"
         deep_nesting += "<Feature>正确位置</Feature></Action>"
         
-        print(f"输入: {deep_nesting[:100]}...{deep_nesting[-50:]}")
+        log(f"输入: {deep_nesting[:100]}...{deep_nesting[-50:]}")
         
         events = list(parser.parse_chunk(deep_nesting)) + list(parser.finalize())
         
-        print("关键事件:")
-        for event in events:
-            if event[0] in ['START_TAG', 'END_TAG']:
-                print(f"  {event}")
+        log_events((e for e in events if e[0] in ('START_TAG', 'END_TAG')), "关键事件:")
         
         # 应该只识别Action和最后一个Feature
-        start_tags = [e for e in events if e[0] == 'START_TAG']
-        feature_tags = [e for e in start_tags if e[1] == 'Feature']
+        feature_tags = classify_events(events)['START_TAG'].get('Feature', [])
         
         self.assertEqual(len(feature_tags), 1)  # 只有正确位置的Feature被识别
     
     def test_streaming_complex_case(self):
         """测试复杂情况下的流式处理"""
-        print("\n=== 测试5：复杂情况下的流式处理 ===")
+        log("\n=== 测试5：复杂情况下的流式处理 ===")
         
         hierarchy = {"Action": ["ToolName", "Description"], "Description": ["Feature"]}
         parser = DynamicTreeParser(hierarchy)
@@ -152,39 +144,40 @@ class TestComplexCases(unittest.TestCase):
             "ure>真的</Feature></Description></Action>"
         ]
         
-        print(f"完整文本: {full_text}")
-        print("分块处理:")
+        log(f"完整文本: {full_text}")
+        log("分块处理:")
         
         all_events = []
         for i, chunk in enumerate(chunks):
-            print(f"  Chunk {i}: {repr(chunk)}")
+            log(f"  Chunk {i}: {repr(chunk)}")
             chunk_events = list(parser.parse_chunk(chunk))
             all_events.extend(chunk_events)
             
             if chunk_events:
                 for event in chunk_events:
-                    print(f"    事件: {event}")
+                    log(f"    事件: {event}")
             else:
-                print("    (无事件)")
+                log("    (无事件)")
         
         final_events = list(parser.finalize())
         all_events.extend(final_events)
         
         if final_events:
-            print("  最终事件:")
+            log("  最终事件:")
             for event in final_events:
-                print(f"    {event}")
+                log(f"    {event}")
         
         # 验证结果
-        start_tags = [e for e in all_events if e[0] == 'START_TAG']
+        start_tags = classify_events(all_events)['START_TAG']
         expected_tags = ['Action', 'ToolName', 'Description', 'Feature']
-        actual_tags = [e[1] for e in start_tags]
         
-        self.assertEqual(actual_tags, expected_tags)
+        # 分组按标签名首次出现的顺序排列，每个标签只应被识别一次
+        self.assertEqual(list(start_tags), expected_tags)
+        self.assertEqual([len(tags) for tags in start_tags.values()], [1] * len(expected_tags))
     
     def test_unicode_and_special_characters(self):
         """测试Unicode和特殊字符"""
-        print("\n=== 测试6：Unicode和特殊字符 ===")
+        log("\n=== 测试6：Unicode和特殊字符 ===")
         
         hierarchy = {"Action": ["Feature"]}
         parser = DynamicTreeParser(hierarchy)
@@ -193,19 +186,17 @@ class TestComplexCases(unittest.TestCase):
         
         events = list(parser.parse_chunk(text)) + list(parser.finalize())
         
-        print(f"输入: {text}")
-        print("事件:")
-        for event in events:
-            print(f"  {event}")
+        log(f"输入: {text}")
+        log_events(events)
         
         # 验证Unicode内容被正确处理
-        content_events = [e for e in events if e[0] == 'CONTENT']
+        content_events = classify_events(events)['CONTENT']
         self.assertTrue(any("🚀" in e[1] for e in content_events))
         self.assertTrue(any("中文" in e[1] for e in content_events))
     
     def test_very_long_content(self):
         """测试非常长的内容"""
-        print("\n=== 测试7：非常长的内容 ===")
+        log("\n=== 测试7：非常长的内容 ===")
 
         hierarchy = {"Action": ["Feature"]}
         parser = DynamicTreeParser(hierarchy)
@@ -214,20 +205,20 @@ class TestComplexCases(unittest.TestCase):
         long_content = "很长的内容 " * 1000  # 约10000字符
         text = f"<Action><Feature>{long_content}</Feature></Action>"
 
-        print(f"输入长度: {len(text)} 字符")
+        log(f"输入长度: {len(text)} 字符")
 
         events = list(parser.parse_chunk(text)) + list(parser.finalize())
 
         # 验证长内容被正确处理
-        content_events = [e for e in events if e[0] == 'CONTENT']
+        content_events = classify_events(events)['CONTENT']
         total_content = ''.join(e[1] for e in content_events if e[2] == 2)  # Feature内的内容
 
         self.assertEqual(total_content, long_content)
-        print(f"✅ 长内容处理正确，长度: {len(total_content)}")
+        log(f"✅ 长内容处理正确，长度: {len(total_content)}")
 
     def test_weird_tag_names(self):
         """测试奇怪的标签名"""
-        print("\n=== 测试8：奇怪的标签名 ===")
+        log("\n=== 测试8：奇怪的标签名 ===")
 
         # 各种奇怪但合法的标签名
         weird_hierarchy = {
@@ -250,26 +241,23 @@ class TestComplexCases(unittest.TestCase):
         ]
 
         for i, text in enumerate(test_cases):
-            print(f"\n子测试 8.{i+1}:")
-            print(f"输入: {text}")
+            log(f"\n子测试 8.{i+1}:")
+            log(f"输入: {text}")
             parser.reset()
 
             events = list(parser.parse_chunk(text)) + list(parser.finalize())
 
-            print("事件:")
-            for event in events:
-                print(f"  {event}")
+            log_events(events)
 
             # 验证奇怪的标签名被正确识别
-            start_tags = [e for e in events if e[0] == 'START_TAG']
-            tag_names = [e[1] for e in start_tags]
+            tag_names = classify_events(events)['START_TAG']
 
             # 至少应该识别根标签
             self.assertIn("Action_v2_final_REAL", tag_names)
 
     def test_extreme_weird_tag_names(self):
         """测试极端奇怪的标签名"""
-        print("\n=== 测试9：极端奇怪的标签名 ===")
+        log("\n=== 测试9：极端奇怪的标签名 ===")
 
         # 更加极端的标签名（但仍然符合XML规范）
         extreme_hierarchy = {
@@ -291,18 +279,14 @@ class TestComplexCases(unittest.TestCase):
             </Component_v1_2_3_FINAL_RELEASE_2024_Q4_HOTFIX>
         </A1B2C3_D4E5F6-G7H8I9>"""
 
-        print(f"输入: {text}")
+        log(f"输入: {text}")
 
         events = list(parser.parse_chunk(text)) + list(parser.finalize())
 
-        print("关键事件:")
-        for event in events:
-            if event[0] in ['START_TAG', 'END_TAG']:
-                print(f"  {event}")
+        log_events((e for e in events if e[0] in ('START_TAG', 'END_TAG')), "关键事件:")
 
         # 验证极端标签名被正确处理
-        start_tags = [e for e in events if e[0] == 'START_TAG']
-        tag_names = [e[1] for e in start_tags]
+        tag_names = classify_events(events)['START_TAG']
 
         # 只有在正确位置的标签应该被识别
         # Component_v1_2_3_FINAL_RELEASE_2024_Q4_HOTFIX 在无效标签中，不应该被识别
@@ -320,7 +304,7 @@ class TestComplexCases(unittest.TestCase):
 
     def test_tag_names_with_numbers_and_special_chars(self):
         """测试包含数字和特殊字符的标签名"""
-        print("\n=== 测试10：包含数字和特殊字符的标签名 ===")
+        log("\n=== 测试10：包含数字和特殊字符的标签名 ===")
 
         # 测试各种合法的XML标签名模式
         special_hierarchy = {
@@ -350,23 +334,21 @@ class TestComplexCases(unittest.TestCase):
         ]
 
         for i, text in enumerate(test_cases):
-            print(f"\n子测试 10.{i+1}:")
-            print(f"输入: {text}")
+            log(f"\n子测试 10.{i+1}:")
+            log(f"输入: {text}")
             parser.reset()
 
             events = list(parser.parse_chunk(text)) + list(parser.finalize())
 
-            print("事件:")
-            for event in events:
-                print(f"  {event}")
+            log_events(events)
 
             # 验证特殊字符标签被正确处理
-            start_tags = [e for e in events if e[0] == 'START_TAG']
+            start_tags = classify_events(events)['START_TAG']
             self.assertGreater(len(start_tags), 0, "应该至少识别一个标签")
 
     def test_case_sensitivity(self):
         """测试大小写敏感性"""
-        print("\n=== 测试11：大小写敏感性 ===")
+        log("\n=== 测试11：大小写敏感性 ===")
 
         hierarchy = {
             "Action": ["Feature"],
@@ -379,17 +361,14 @@ class TestComplexCases(unittest.TestCase):
         # 测试大小写敏感
         text = "<Action><Feature>大写A</Feature></Action><action><feature>小写a</feature></action><ACTION><FEATURE>全大写</FEATURE></ACTION><Action><feature>混合大小写</feature></Action>"
 
-        print(f"输入: {text}")
+        log(f"输入: {text}")
 
         events = list(parser.parse_chunk(text)) + list(parser.finalize())
 
-        print("事件:")
-        for event in events:
-            print(f"  {event}")
+        log_events(events)
 
         # 验证大小写敏感性
-        start_tags = [e for e in events if e[0] == 'START_TAG']
-        tag_names = [e[1] for e in start_tags]
+        tag_names = classify_events(events)['START_TAG']
 
         # 应该识别所有正确大小写的标签
         expected_tags = ["Action", "Feature", "action", "feature", "ACTION", "FEATURE"]
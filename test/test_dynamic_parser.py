@@ -3,31 +3,40 @@
 """
 
 import unittest
-from src.dynamic_tree_parser import DynamicTreeParser, DynamicTreeEventHandler
+from src.dynamic_tree_parser import DynamicTreeParser, DynamicTreeEventHandler, classify_events
+from verbose_output import test_output
+
+log, log_events = test_output.log, test_output.log_events
 
 
 class TestDynamicTreeParser(unittest.TestCase):
     """测试DynamicTreeParser类"""
-    
+
+    # 情况2~4共用的输入：同一段文本在不同层次结构下解析出不同的标签
+    TEXT_ACTION_FULL = "<Action><ToolName>image_gen</ToolName><Description><Feature>通义万相是一个图像生成服务，输入文本描述，可以得到图片的URL</Feature></Description></Action>"
+
+    def collect_events(self, parser, *chunks):
+        """依次解析各个chunk并收集包括 finalize 在内的全部事件"""
+        events = []
+        for chunk in chunks:
+            events.extend(parser.parse_chunk(chunk))
+        events.extend(parser.finalize())
+        return events
+
     def test_case_1_missing_expected_child(self):
         """测试情况1：缺少预期的子标签"""
         # 解析器知道 Action -> ToolName，但文本中没有ToolName
         hierarchy = {"Action": ["ToolName"]}
-        parser = DynamicTreeParser(hierarchy)
+        # 合并模式下连续的内容片段直接合并为一个CONTENT事件，可以与期望的结构直接比较
+        parser = DynamicTreeParser(hierarchy, coalesce_content=True)
         
         text = "<Action><Description><Feature>通义万相是一个图像生成服务，输入文本描述，可以得到图片的URL</Feature></Description></Action>"
         
-        events = []
-        for event in parser.parse_chunk(text):
-            events.append(event)
-        for event in parser.finalize():
-            events.append(event)
+        events = self.collect_events(parser, text)
         
-        print("测试情况1 - 缺少预期子标签:")
-        print(f"输入: {text}")
-        print("事件:")
-        for event in events:
-            print(f"  {event}")
+        log("测试情况1 - 缺少预期子标签:")
+        log(f"输入: {text}")
+        log_events(events)
         
         # 应该只识别Action标签，其余都是内容
         expected_structure = [
@@ -36,29 +45,21 @@ class TestDynamicTreeParser(unittest.TestCase):
             ('END_TAG', 'Action', 0)
         ]
         
-        # 合并连续的CONTENT事件
-        merged_events = self._merge_content_events(events)
-        self.assertEqual(merged_events, expected_structure)
+        self.assertEqual(events, expected_structure)
     
     def test_case_2_pseudo_tag_in_content(self):
         """测试情况2：内容中的伪标签"""
         # 解析器知道 Action -> Feature，但Feature出现在不正确的位置
         hierarchy = {"Action": ["Feature"]}
-        parser = DynamicTreeParser(hierarchy)
+        parser = DynamicTreeParser(hierarchy, coalesce_content=True)
         
-        text = "<Action><ToolName>image_gen</ToolName><Description><Feature>通义万相是一个图像生成服务，输入文本描述，可以得到图片的URL</Feature></Description></Action>"
+        text = self.TEXT_ACTION_FULL
         
-        events = []
-        for event in parser.parse_chunk(text):
-            events.append(event)
-        for event in parser.finalize():
-            events.append(event)
+        events = self.collect_events(parser, text)
         
-        print("\n测试情况2 - 内容中的伪标签:")
-        print(f"输入: {text}")
-        print("事件:")
-        for event in events:
-            print(f"  {event}")
+        log("\n测试情况2 - 内容中的伪标签:")
+        log(f"输入: {text}")
+        log_events(events)
         
         # 应该只识别Action标签，Feature不在正确位置所以是内容
         expected_structure = [
@@ -67,8 +68,7 @@ class TestDynamicTreeParser(unittest.TestCase):
             ('END_TAG', 'Action', 0)
         ]
         
-        merged_events = self._merge_content_events(events)
-        self.assertEqual(merged_events, expected_structure)
+        self.assertEqual(events, expected_structure)
     
     def test_case_3_correct_hierarchy(self):
         """测试情况3：正确的层次结构"""
@@ -76,21 +76,15 @@ class TestDynamicTreeParser(unittest.TestCase):
             "Action": ["ToolName", "Description"],
             "Description": ["Feature"]
         }
-        parser = DynamicTreeParser(hierarchy)
+        parser = DynamicTreeParser(hierarchy, coalesce_content=True)
         
-        text = "<Action><ToolName>image_gen</ToolName><Description><Feature>通义万相是一个图像生成服务，输入文本描述，可以得到图片的URL</Feature></Description></Action>"
+        text = self.TEXT_ACTION_FULL
         
-        events = []
-        for event in parser.parse_chunk(text):
-            events.append(event)
-        for event in parser.finalize():
-            events.append(event)
+        events = self.collect_events(parser, text)
         
-        print("\n测试情况3 - 正确的层次结构:")
-        print(f"输入: {text}")
-        print("事件:")
-        for event in events:
-            print(f"  {event}")
+        log("\n测试情况3 - 正确的层次结构:")
+        log(f"输入: {text}")
+        log_events(events)
         
         # 应该识别所有正确位置的标签
         expected_structure = [
@@ -106,29 +100,22 @@ class TestDynamicTreeParser(unittest.TestCase):
             ('END_TAG', 'Action', 0)
         ]
         
-        merged_events = self._merge_content_events(events)
-        self.assertEqual(merged_events, expected_structure)
+        self.assertEqual(events, expected_structure)
     
     def test_case_4_partial_hierarchy(self):
         """测试情况4：部分层次结构"""
         hierarchy = {
             "Action": ["ToolName", "Description"]
         }
-        parser = DynamicTreeParser(hierarchy)
+        parser = DynamicTreeParser(hierarchy, coalesce_content=True)
         
-        text = "<Action><ToolName>image_gen</ToolName><Description><Feature>通义万相是一个图像生成服务，输入文本描述，可以得到图片的URL</Feature></Description></Action>"
+        text = self.TEXT_ACTION_FULL
         
-        events = []
-        for event in parser.parse_chunk(text):
-            events.append(event)
-        for event in parser.finalize():
-            events.append(event)
+        events = self.collect_events(parser, text)
         
-        print("\n测试情况4 - 部分层次结构:")
-        print(f"输入: {text}")
-        print("事件:")
-        for event in events:
-            print(f"  {event}")
+        log("\n测试情况4 - 部分层次结构:")
+        log(f"输入: {text}")
+        log_events(events)
         
         # 应该识别Action、ToolName、Description，但Feature不在层次结构中
         expected_structure = [
@@ -142,8 +129,7 @@ class TestDynamicTreeParser(unittest.TestCase):
             ('END_TAG', 'Action', 0)
         ]
         
-        merged_events = self._merge_content_events(events)
-        self.assertEqual(merged_events, expected_structure)
+        self.assertEqual(events, expected_structure)
     
     def test_case_5_valid_tag_after_invalid_tags(self):
         """测试情况5：有效标签出现在无效标签之后"""
@@ -152,41 +138,34 @@ class TestDynamicTreeParser(unittest.TestCase):
 
         text = "<Action><ToolName>image_gen</ToolName><Description>通义万相是一个图像生成服务，输入文本描述，可以得到图片的URL</Description><Feature>第三方MCP工具</Feature></Action>"
 
-        events = []
-        for event in parser.parse_chunk(text):
-            events.append(event)
-        for event in parser.finalize():
-            events.append(event)
+        events = self.collect_events(parser, text)
 
-        print("\n测试情况5 - 有效标签出现在无效标签之后:")
-        print(f"输入: {text}")
-        print("事件:")
-        for event in events:
-            print(f"  {event}")
+        log("\n测试情况5 - 有效标签出现在无效标签之后:")
+        log(f"输入: {text}")
+        log_events(events)
 
         # 验证标签结构
-        start_tags = [e for e in events if e[0] == 'START_TAG']
-        end_tags = [e for e in events if e[0] == 'END_TAG']
-        content_events = [e for e in events if e[0] == 'CONTENT']
+        classified = classify_events(events)
 
         # 应该识别Action和Feature两个标签
-        self.assertEqual(len(start_tags), 2)
-        self.assertEqual(len(end_tags), 2)
-        self.assertEqual(start_tags[0], ('START_TAG', 'Action', 0))
-        self.assertEqual(start_tags[1], ('START_TAG', 'Feature', 1))
-        self.assertEqual(end_tags[0], ('END_TAG', 'Feature', 1))
-        self.assertEqual(end_tags[1], ('END_TAG', 'Action', 0))
+        self.assertEqual(classified['START_TAG'], {
+            'Action': [('START_TAG', 'Action', 0)],
+            'Feature': [('START_TAG', 'Feature', 1)],
+        })
+        self.assertEqual(classified['END_TAG'], {
+            'Feature': [('END_TAG', 'Feature', 1)],
+            'Action': [('END_TAG', 'Action', 0)],
+        })
 
         # 验证内容分布
         action_content = ""
         feature_content = ""
 
-        for event_type, data, level in events:
-            if event_type == 'CONTENT':
-                if level == 1:  # Action内的内容
-                    action_content += data
-                elif level == 2:  # Feature内的内容
-                    feature_content += data
+        for event_type, data, level in classified['CONTENT']:
+            if level == 1:  # Action内的内容
+                action_content += data
+            elif level == 2:  # Feature内的内容
+                feature_content += data
 
         expected_action_content = "<ToolName>image_gen</ToolName><Description>通义万相是一个图像生成服务，输入文本描述，可以得到图片的URL</Description>"
         expected_feature_content = "第三方MCP工具"
@@ -197,7 +176,7 @@ class TestDynamicTreeParser(unittest.TestCase):
     def test_streaming_processing(self):
         """测试流式处理"""
         hierarchy = {"Action": ["ToolName", "Description"]}
-        parser = DynamicTreeParser(hierarchy)
+        parser = DynamicTreeParser(hierarchy, coalesce_content=True)
         
         # 分块输入
         chunks = [
@@ -207,18 +186,11 @@ class TestDynamicTreeParser(unittest.TestCase):
             "ription></Action>"
         ]
         
-        events = []
-        for chunk in chunks:
-            for event in parser.parse_chunk(chunk):
-                events.append(event)
-        for event in parser.finalize():
-            events.append(event)
+        events = self.collect_events(parser, *chunks)
         
-        print("\n测试流式处理:")
-        print("分块输入:", chunks)
-        print("事件:")
-        for event in events:
-            print(f"  {event}")
+        log("\n测试流式处理:")
+        log("分块输入:", chunks)
+        log_events(events)
         
         # 验证流式处理结果正确
         expected_structure = [
@@ -232,30 +204,144 @@ class TestDynamicTreeParser(unittest.TestCase):
             ('END_TAG', 'Action', 0)
         ]
         
-        merged_events = self._merge_content_events(events)
-        self.assertEqual(merged_events, expected_structure)
-    
-    def _merge_content_events(self, events):
-        """合并连续的CONTENT事件"""
-        merged = []
-        content_buffer = ""
-        current_level = 0
-        
-        for event_type, data, level in events:
-            if event_type == 'CONTENT':
-                if not content_buffer:
-                    current_level = level
-                content_buffer += data
-            else:
-                if content_buffer:
-                    merged.append(('CONTENT', content_buffer, current_level))
-                    content_buffer = ""
-                merged.append((event_type, data, level))
-        
-        if content_buffer:
-            merged.append(('CONTENT', content_buffer, current_level))
-        
-        return merged
+        self.assertEqual(events, expected_structure)
+
+    def test_tag_split_across_many_chunks(self):
+        """测试跨越大量chunk的标签：闭合前不产生事件，闭合后从断点继续解析"""
+        hierarchy = {"Action": ["ToolName"]}
+        parser = DynamicTreeParser(hierarchy)
+
+        self.assertEqual(parser.feed("前言<Action"), [('CONTENT', '前言', 0)])
+        for ch in ' id="' + "x" * 1000 + '"':
+            self.assertEqual(parser.feed(ch), [])
+        self.assertEqual(parser.feed("><ToolName>a"), [
+            ('START_TAG', 'Action', 0),
+            ('START_TAG', 'ToolName', 1),
+            ('CONTENT', 'a', 2),
+        ])
+        self.assertEqual(parser.feed("</ToolName></Action>"), [
+            ('END_TAG', 'ToolName', 1),
+            ('END_TAG', 'Action', 0),
+        ])
+        self.assertEqual(list(parser.finalize()), [])
+
+    def test_reset_keeps_tag_tree(self):
+        """测试 reset 和 finalize 只清空解析状态，标签树保持不变且解析器可以复用"""
+        hierarchy = {"Action": ["ToolName"]}
+        parser = DynamicTreeParser(hierarchy)
+        tag_tree = parser.tag_tree
+
+        list(parser.parse_chunk("<Action><Tool"))
+        list(parser.finalize())
+        self.assertIs(parser.tag_tree, tag_tree)
+
+        events = list(parser.parse_chunk("<Action>x</Action>")) + list(parser.finalize())
+        self.assertEqual(events, [
+            ('START_TAG', 'Action', 0),
+            ('CONTENT', 'x', 1),
+            ('END_TAG', 'Action', 0),
+        ])
+
+        parser.reset()
+        self.assertIs(parser.tag_tree, tag_tree)
+
+    def test_same_hierarchy_builds_separate_tag_trees(self):
+        """测试相同的层次结构只编译一次，但各解析器的标签树和解析状态互不影响"""
+        from src.dynamic_tree_parser import _compile_hierarchy
+
+        hierarchy = {"Action": ["ToolName"], "ToolName": ["Arg"]}
+        first = DynamicTreeParser(hierarchy)
+        hits = _compile_hierarchy.cache_info().hits
+        second = DynamicTreeParser({"Action": ["ToolName"], "ToolName": ["Arg"]})
+        self.assertEqual(_compile_hierarchy.cache_info().hits, hits + 1)
+        self.assertIsNot(first.tag_tree["Action"], second.tag_tree["Action"])
+
+        # 修改一个解析器的标签树不会影响其他解析器
+        first.tag_tree["Action"].add_child("Extra")
+        self.assertEqual(list(second.tag_tree["Action"].children), ["ToolName"])
+        self.assertEqual(
+            list(DynamicTreeParser(hierarchy).parse_chunk("<Action><Extra>")),
+            [('START_TAG', 'Action', 0), ('CONTENT', '<Extra>', 1)]
+        )
+
+        list(first.parse_chunk("<Action><ToolName>"))
+        events = list(second.parse_chunk("<Action>x</Action>"))
+        self.assertEqual(events, [
+            ('START_TAG', 'Action', 0),
+            ('CONTENT', 'x', 1),
+            ('END_TAG', 'Action', 0),
+        ])
+
+    def test_subclass_build_tag_tree(self):
+        """测试子类重写的 _build_tag_tree 会被使用，且编译结果不与基类共享"""
+        class GreetingParser(DynamicTreeParser):
+            @staticmethod
+            def _build_tag_tree(hierarchy):
+                return DynamicTreeParser._build_tag_tree({**hierarchy, "Greeting": []})
+
+        hierarchy = {"Action": ["ToolName"]}
+        self.assertIn("Greeting", GreetingParser(hierarchy).tag_tree)
+        self.assertNotIn("Greeting", DynamicTreeParser(hierarchy).tag_tree)
+
+    def test_coalesce_content(self):
+        """测试合并模式下连续的内容片段只产生一个CONTENT事件"""
+        hierarchy = {"Action": ["ToolName"]}
+        text = "<Action>调用<Tool>x</Tool><ToolName>image_gen</ToolName>完成</Action>"
+        chunks = [text[i:i + 2] for i in range(0, len(text), 2)]
+
+        events = self.collect_events(DynamicTreeParser(hierarchy), *chunks)
+
+        coalesced = self.collect_events(DynamicTreeParser(hierarchy, coalesce_content=True), *chunks)
+
+        self.assertEqual(coalesced, [
+            ('START_TAG', 'Action', 0),
+            ('CONTENT', '调用<Tool>x</Tool>', 1),
+            ('START_TAG', 'ToolName', 1),
+            ('CONTENT', 'image_gen', 2),
+            ('END_TAG', 'ToolName', 1),
+            ('CONTENT', '完成', 1),
+            ('END_TAG', 'Action', 0),
+        ])
+        # 默认模式逐片段输出，标签事件相同，内容拼接后一致
+        self.assertEqual([e for e in events if e[0] != 'CONTENT'], [e for e in coalesced if e[0] != 'CONTENT'])
+        self.assertEqual("".join(e[1] for e in events if e[0] == 'CONTENT'),
+                         "".join(e[1] for e in coalesced if e[0] == 'CONTENT'))
+
+    def test_parse_chunk_raw(self):
+        """测试整数事件码接口与 parse_chunk 产生相同的事件"""
+        from src.common.xml_events import EVENT_CODES, EVENT_NAMES, EVENT_START
+
+        hierarchy = {"Action": ["ToolName"]}
+        chunks = ["<Action><Tool", "Name>image_gen</ToolName>", "<Wrong>完成</Action>尾部"]
+
+        events = self.collect_events(DynamicTreeParser(hierarchy), *chunks)
+
+        raw_parser = DynamicTreeParser(hierarchy)
+        raw_events = []
+        for chunk in chunks:
+            raw_events.extend(raw_parser.parse_chunk_raw(chunk))
+        raw_events.extend(raw_parser.finalize_raw())
+
+        self.assertEqual(
+            raw_events,
+            [(EVENT_CODES[event_type], data, level) for event_type, data, level in events]
+        )
+        self.assertEqual([(EVENT_NAMES[code], data, level) for code, data, level in raw_events], events)
+        # 整数事件码可以直接按整数比较过滤
+        start_tags = [e for e in raw_events if e[0] == EVENT_START]
+        self.assertEqual(start_tags, [(EVENT_START, 'Action', 0), (EVENT_START, 'ToolName', 1)])
+
+    def test_close_generator_early(self):
+        """测试提前关闭 parse_chunk 的生成器后，已产生的事件不会被重复产生"""
+        parser = DynamicTreeParser({"Action": ["ToolName"]})
+        events = parser.parse_chunk("<Action>hi</Action>tail")
+        self.assertEqual(next(events), ('START_TAG', 'Action', 0))
+        events.close()
+
+        self.assertEqual(
+            parser.feed("!") + list(parser.finalize()),
+            [('CONTENT', 'hi', 1), ('END_TAG', 'Action', 0), ('CONTENT', 'tail!', 0)]
+        )
 
 
 class TestEventHandler(DynamicTreeEventHandler):
@@ -292,6 +378,22 @@ class TestDynamicTreeEventHandler(unittest.TestCase):
         self.assertEqual(handler.events[0][0], 'START_TAG')
         self.assertEqual(handler.events[0][1], 'Action')
 
+    def test_event_handler_accepts_event_codes(self):
+        """测试事件处理器同样接受整数事件码"""
+        handler = TestEventHandler()
+        parser = DynamicTreeParser({"Action": ["ToolName"]})
+
+        for event in parser.parse_chunk_raw("<Action><ToolName>test</ToolName></Action>"):
+            handler.handle_event(*event)
+
+        self.assertEqual(handler.events, [
+            ('START_TAG', 'Action', 0),
+            ('START_TAG', 'ToolName', 1),
+            ('CONTENT', 'test', 2),
+            ('END_TAG', 'ToolName', 1),
+            ('END_TAG', 'Action', 0),
+        ])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -6,28 +6,46 @@ import unittest
 from src.outer_xml_parser import OuterXMLParser, OuterXMLEventHandler
 
 
+def merge_content_events(events):
+    """合并连续的CONTENT事件：逐字符输入时内容会拆成多个片段，合并后再与期望的事件比较"""
+    merged = []
+    content_parts = []  # 连续的内容片段先收集，遇到标签事件时再一次拼接
+
+    for event_type, data in events:
+        if event_type == 'CONTENT':
+            if data:
+                content_parts.append(data)
+        else:
+            if content_parts:
+                merged.append(('CONTENT', "".join(content_parts)))
+                content_parts.clear()
+            merged.append((event_type, data))
+
+    if content_parts:
+        merged.append(('CONTENT', "".join(content_parts)))
+
+    return merged
+
+
 class TestOuterXMLParser(unittest.TestCase):
     """测试OuterXMLParser类"""
     
     def setUp(self):
-        """测试前的设置"""
+        """测试前的设置：每个测试使用新的解析器，结果不依赖测试的执行顺序"""
         self.parser = OuterXMLParser()
     
     def parse_text(self, text: str, chunk_size: int = 1):
-        """辅助方法：将文本分块解析并收集所有事件"""
+        """辅助方法：将文本分块解析并收集所有事件，连续的CONTENT事件合并为一个"""
         events = []
         
-        # 分块解析
+        # 分块解析，extend 直接消费事件生成器
         for i in range(0, len(text), chunk_size):
-            chunk = text[i:i + chunk_size]
-            for event in self.parser.parse_chunk(chunk):
-                events.append(event)
+            events.extend(self.parser.parse_chunk(text[i:i + chunk_size]))
         
         # 获取最终事件
-        for event in self.parser.finalize():
-            events.append(event)
+        events.extend(self.parser.finalize())
             
-        return events
+        return merge_content_events(events)
     
     def test_simple_outer_tag(self):
         """测试简单的外层标签"""
@@ -85,7 +103,7 @@ class TestOuterXMLParser(unittest.TestCase):
         self.assertEqual(events, expected)
     
     def test_content_between_tags(self):
-        """测试标签之间的内容"""
+        """测试标签之间的内容：纯空白的内容不产生CONTENT事件"""
         text = "<Start>content1</Start>\n\n<Thought>content2</Thought>"
         events = self.parse_text(text)
         
@@ -93,7 +111,6 @@ class TestOuterXMLParser(unittest.TestCase):
             ('START_TAG', 'Start'),
             ('CONTENT', 'content1'),
             ('END_TAG', 'Start'),
-            ('CONTENT', '\n\n'),
             ('START_TAG', 'Thought'),
             ('CONTENT', 'content2'),
             ('END_TAG', 'Thought')
@@ -112,7 +129,28 @@ class TestOuterXMLParser(unittest.TestCase):
         ]
         
         self.assertEqual(events, expected)
-    
+
+    def test_whitespace_only_content(self):
+        """测试纯空白内容不会产生CONTENT事件"""
+        parser = OuterXMLParser()
+
+        # 纯空白的标签内容被丢弃
+        events = list(parser.parse_chunk("<Start>  \n</Start>"))
+        self.assertEqual(events, [('START_TAG', 'Start'), ('END_TAG', 'Start')])
+
+        # 跨chunk的前导空白与后续可见内容合并输出
+        events = list(parser.parse_chunk("<Start>"))
+        events.extend(parser.parse_chunk("  "))
+        events.extend(parser.parse_chunk("text</Start>"))
+
+        expected = [
+            ('START_TAG', 'Start'),
+            ('CONTENT', '  text'),
+            ('END_TAG', 'Start')
+        ]
+
+        self.assertEqual(events, expected)
+
     def test_streaming_with_incomplete_tags(self):
         """测试流式处理中的不完整标签"""
         parser = OuterXMLParser()
@@ -161,34 +199,44 @@ class TestOuterXMLParser(unittest.TestCase):
     def test_chunk_size_variations(self):
         """测试不同的chunk大小"""
         text = "<Start><Reason>UserInput</Reason></Start>"
+        expected = [
+            ('START_TAG', 'Start'),
+            ('CONTENT', '<Reason>UserInput</Reason>'),
+            ('END_TAG', 'Start')
+        ]
         
         # 测试不同的chunk大小都能得到相同结果
         for chunk_size in [1, 3, 5, 10, 20]:
             with self.subTest(chunk_size=chunk_size):
-                events = self.parse_text(text, chunk_size)
-                expected = [
-                    ('START_TAG', 'Start'),
-                    ('CONTENT', '<Reason>UserInput</Reason>'),
-                    ('END_TAG', 'Start')
-                ]
-                
-                # 合并连续的CONTENT事件
-                merged_events = []
-                content_buffer = ""
-                
-                for event_type, data in events:
-                    if event_type == 'CONTENT':
-                        content_buffer += data
-                    else:
-                        if content_buffer:
-                            merged_events.append(('CONTENT', content_buffer))
-                            content_buffer = ""
-                        merged_events.append((event_type, data))
-                
-                if content_buffer:
-                    merged_events.append(('CONTENT', content_buffer))
-                
-                self.assertEqual(merged_events, expected)
+                self.assertListEqual(self.parse_text(text, chunk_size), expected)
+
+    def test_parse_chunks_matches_parse_chunk(self):
+        """测试批量解析与逐个chunk解析产生相同的事件"""
+        text = "<Start><Reason>UserInput</Reason></Start>\n<Thought>思考</Thought>"
+        chunks = [text[i:i + 3] for i in range(0, len(text), 3)]
+
+        events = []
+        for chunk in chunks:
+            events.extend(self.parser.parse_chunk(chunk))
+
+        batch_parser = OuterXMLParser()
+        self.assertEqual(list(batch_parser.parse_chunks(chunks)), events)
+
+    def test_reuse_after_finalize(self):
+        """测试 finalize 后解析器回到初始状态，可以直接解析下一个流"""
+        self.parse_text("<Start>未闭合的内容", chunk_size=3)
+
+        events = self.parse_text("<Start>内容</Start>", chunk_size=3)
+        self.assertEqual(events[0], ('START_TAG', 'Start'))
+        self.assertEqual(events[-1], ('END_TAG', 'Start'))
+
+    def test_finalize_resets_before_yielding(self):
+        """测试 finalize 在产生剩余事件前已重置状态，未读完剩余事件也可以解析下一个流"""
+        self.parser.feed("<Start>内容</Sta")
+        remaining = self.parser.finalize()
+        self.assertEqual(next(remaining), ('CONTENT', '</Sta'))
+
+        self.assertEqual(self.parser.feed("<Start>x"), [('START_TAG', 'Start'), ('CONTENT', 'x')])
 
 
 class TestEventHandler(OuterXMLEventHandler):
@@ -219,29 +267,34 @@ class TestOuterXMLEventHandler(unittest.TestCase):
         
         parse_outer_stream(chunks, handler)
         
-        # 合并连续的CONTENT事件
-        merged_events = []
-        content_buffer = ""
-        
-        for event_type, data in handler.events:
-            if event_type == 'CONTENT':
-                content_buffer += data
-            else:
-                if content_buffer:
-                    merged_events.append(('CONTENT', content_buffer))
-                    content_buffer = ""
-                merged_events.append((event_type, data))
-        
-        if content_buffer:
-            merged_events.append(('CONTENT', content_buffer))
-        
         expected = [
             ('START_TAG', 'Start'),
             ('CONTENT', '<Reason>test</Reason>'),
             ('END_TAG', 'Start')
         ]
         
-        self.assertEqual(merged_events, expected)
+        self.assertEqual(merge_content_events(handler.events), expected)
+
+    def test_overridden_handle_event(self):
+        """测试重写了 handle_event 的处理器同样收到全部事件"""
+        from src.outer_xml_parser import parse_outer_stream
+
+        class RecordingHandler(OuterXMLEventHandler):
+            def __init__(self):
+                self.events = []
+
+            def handle_event(self, event_type, data):
+                self.events.append((event_type, data))
+
+        handler = RecordingHandler()
+        parse_outer_stream(["<Start>", "ok", "</Start>尾部"], handler)
+
+        self.assertEqual(handler.events, [
+            ('START_TAG', 'Start'),
+            ('CONTENT', 'ok'),
+            ('END_TAG', 'Start'),
+            ('CONTENT', '尾部'),
+        ])
 
 
 if __name__ == '__main__':
@@ -8,36 +8,54 @@ from src.streaming_xml_parser import StreamingXMLParser, XMLEventHandler
 
 class TestStreamingXMLParser(unittest.TestCase):
     """测试StreamingXMLParser类"""
+
+    # test_complex_llm_output 期望的标签事件顺序
+    EXPECTED_LLM_TAGS = (
+        ('START_TAG', 'UserInput'),
+        ('START_TAG', 'Content'),
+        ('END_TAG', 'Content'),
+        ('END_TAG', 'UserInput'),
+        ('START_TAG', 'Start'),
+        ('START_TAG', 'Reason'),
+        ('END_TAG', 'Reason'),
+        ('END_TAG', 'Start'),
+        ('START_TAG', 'Thought'),
+        ('START_TAG', 'Content'),
+        ('END_TAG', 'Content'),
+        ('END_TAG', 'Thought')
+    )
     
     def setUp(self):
-        """测试前的设置"""
+        """测试前的设置：每个测试使用新的解析器，结果不依赖测试的执行顺序"""
         self.parser = StreamingXMLParser()
     
     def parse_text(self, text: str, chunk_size: int = 1):
         """辅助方法：将文本分块解析并收集所有事件"""
         events = []
         
-        # 分块解析
+        # 分块解析，extend 直接消费事件生成器
         for i in range(0, len(text), chunk_size):
-            chunk = text[i:i + chunk_size]
-            for event in self.parser.parse_chunk(chunk):
-                events.append(event)
+            events.extend(self.parser.parse_chunk(text[i:i + chunk_size]))
         
         # 获取最终事件
-        for event in self.parser.finalize():
-            events.append(event)
+        events.extend(self.parser.finalize())
             
         return events
     
+    def split_events(self, events):
+        """把事件分为起始标签、结束标签和内容三组，各组保持原有顺序"""
+        start_tags = [e for e in events if e[0] == 'START_TAG']
+        end_tags = [e for e in events if e[0] == 'END_TAG']
+        content_events = [e for e in events if e[0] == 'CONTENT']
+        return start_tags, end_tags, content_events
+
     def test_simple_tag(self):
         """测试简单标签"""
         text = "<tag>content</tag>"
         events = self.parse_text(text)
 
         # 验证标签结构
-        start_tags = [e for e in events if e[0] == 'START_TAG']
-        end_tags = [e for e in events if e[0] == 'END_TAG']
-        content_events = [e for e in events if e[0] == 'CONTENT']
+        start_tags, end_tags, content_events = self.split_events(events)
 
         self.assertEqual(len(start_tags), 1)
         self.assertEqual(len(end_tags), 1)
@@ -76,9 +94,7 @@ class TestStreamingXMLParser(unittest.TestCase):
         events = self.parse_text(text, chunk_size=3)
         
         # 应该有一个START_TAG，多个CONTENT事件，一个END_TAG
-        start_tags = [e for e in events if e[0] == 'START_TAG']
-        end_tags = [e for e in events if e[0] == 'END_TAG']
-        content_events = [e for e in events if e[0] == 'CONTENT']
+        start_tags, end_tags, content_events = self.split_events(events)
         
         self.assertEqual(len(start_tags), 1)
         self.assertEqual(len(end_tags), 1)
@@ -95,9 +111,7 @@ class TestStreamingXMLParser(unittest.TestCase):
         events = self.parse_text(text)
 
         # 验证标签结构
-        start_tags = [e for e in events if e[0] == 'START_TAG']
-        end_tags = [e for e in events if e[0] == 'END_TAG']
-        content_events = [e for e in events if e[0] == 'CONTENT']
+        start_tags, end_tags, content_events = self.split_events(events)
 
         self.assertEqual(len(start_tags), 1)
         self.assertEqual(len(end_tags), 1)
@@ -129,24 +143,9 @@ class TestStreamingXMLParser(unittest.TestCase):
         events = self.parse_text(text, chunk_size=5)
         
         # 验证标签顺序
-        tag_events = [(e[0], e[1]) for e in events if e[0] in ['START_TAG', 'END_TAG']]
-        
-        expected_tags = [
-            ('START_TAG', 'UserInput'),
-            ('START_TAG', 'Content'),
-            ('END_TAG', 'Content'),
-            ('END_TAG', 'UserInput'),
-            ('START_TAG', 'Start'),
-            ('START_TAG', 'Reason'),
-            ('END_TAG', 'Reason'),
-            ('END_TAG', 'Start'),
-            ('START_TAG', 'Thought'),
-            ('START_TAG', 'Content'),
-            ('END_TAG', 'Content'),
-            ('END_TAG', 'Thought')
-        ]
+        tag_events = [(e[0], e[1]) for e in events if e[0] in {'START_TAG', 'END_TAG'}]
         
-        self.assertEqual(tag_events, expected_tags)
+        self.assertListEqual(tag_events, list(self.EXPECTED_LLM_TAGS))
     
     def test_incomplete_tag_handling(self):
         """测试不完整标签的处理"""
@@ -187,6 +186,55 @@ class TestStreamingXMLParser(unittest.TestCase):
             else:
                 self.assertEqual(events[0], ('START_TAG', expected_name))
 
+    def test_bytes_input(self):
+        """测试字节输入，多字节字符被chunk边界截断时也能正确解码"""
+        data = "<tag>你好</tag>".encode('utf-8')
+
+        # memoryview 切片不复制底层字节，逐块输入时同样可以直接交给解析器
+        for source in (data, memoryview(data)):
+            with self.subTest(source=type(source).__name__):
+                events = []
+                for i in range(0, len(source), 2):
+                    events.extend(self.parser.parse_chunk(source[i:i + 2]))
+                events.extend(self.parser.finalize())
+
+                content = "".join(text for event_type, text in events if event_type == 'CONTENT')
+                self.assertEqual(events[0], ('START_TAG', 'tag'))
+                self.assertEqual(content, "你好")
+                self.assertEqual(events[-1], ('END_TAG', 'tag'))
+
+    def test_truncated_bytes_at_end(self):
+        """测试字节输入以不完整的多字节字符结尾时，finalize 抛出 UnicodeDecodeError"""
+        self.assertEqual(list(self.parser.parse_chunk(b"<a>x\xe4\xbd")), [('START_TAG', 'a'), ('CONTENT', 'x')])
+        with self.assertRaises(UnicodeDecodeError):
+            list(self.parser.finalize())
+
+    def test_feed(self):
+        """测试推送式接口：事件可以跨多次 feed 产生"""
+        self.assertEqual(self.parser.feed("<ta"), [])
+        self.assertEqual(self.parser.feed("g>内容</"), [('START_TAG', 'tag'), ('CONTENT', '内容')])
+        self.assertEqual(self.parser.feed(b"tag>"), [('END_TAG', 'tag')])
+        self.assertEqual(list(self.parser.finalize()), [])
+
+    def test_close_generator_early(self):
+        """测试提前关闭 parse_chunk 的生成器后，已产生的事件不会被重复产生"""
+        events = self.parser.parse_chunk("<tag>内容</tag>尾部")
+        self.assertEqual(next(events), ('START_TAG', 'tag'))
+        events.close()
+
+        self.assertEqual(
+            self.parser.feed("!") + list(self.parser.finalize()),
+            [('CONTENT', '内容'), ('END_TAG', 'tag'), ('CONTENT', '尾部!')]
+        )
+
+    def test_finalize_resets_before_yielding(self):
+        """测试 finalize 在产生剩余事件前已重置状态，未读完剩余事件也可以解析下一个流"""
+        self.assertEqual(self.parser.feed("文本<"), [('CONTENT', '文本')])
+        remaining = self.parser.finalize()
+        self.assertEqual(next(remaining), ('CONTENT', '<'))
+
+        self.assertEqual(self.parser.feed("<tag>"), [('START_TAG', 'tag')])
+
 
 class TestEventHandler(XMLEventHandler):
     """测试用的事件处理器"""
@@ -0,0 +1,62 @@
+"""
+测试和演示脚本共用的输出控制
+
+所有输出都经过这里的函数，由环境变量 XMLP_VERBOSE 控制是否输出。
+演示默认输出解析过程，设置 XMLP_VERBOSE=0 时丢弃全部输出，可以直接作为解析器的基准测试运行；
+单元测试默认不输出，设置 XMLP_VERBOSE=1 时才输出诊断信息。
+"""
+
+import os
+import sys
+
+
+# 视为关闭的环境变量取值（不区分大小写）
+_FALSE_VALUES = frozenset(("", "0", "false", "no", "off"))
+
+
+def env_flag(name: str, default: bool) -> bool:
+    """读取布尔型环境变量：未设置时返回 default，0/false/no/off 等取值为关闭，其余取值为开启"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in _FALSE_VALUES
+
+
+class VerboseOutput:
+    """一组受 XMLP_VERBOSE 控制的输出函数，未设置该环境变量时按 default 决定是否输出"""
+
+    __slots__ = ('enabled',)
+
+    def __init__(self, default: bool):
+        self.enabled = env_flag("XMLP_VERBOSE", default)
+
+    def log(self, *args, **kwargs):
+        """与 print 相同，关闭时丢弃输出"""
+        if self.enabled:
+            print(*args, **kwargs)
+
+    def write(self, text: str):
+        """批量写出已格式化好的输出，关闭时丢弃"""
+        if self.enabled:
+            sys.stdout.write(text)
+
+    def log_events(self, events, title="事件:"):
+        """逐行输出事件，关闭时直接返回，不格式化任何事件"""
+        if self.enabled:
+            print(title)
+            for event in events:
+                print(f"  {event}")
+
+
+# 预先生成的缩进字符串，避免每个事件都重新构造
+_INDENTS = tuple("  " * i for i in range(64))
+
+
+def indentation(depth: int) -> str:
+    """返回 depth 层的缩进（每层两个空格），常用深度直接取预先生成的字符串"""
+    return _INDENTS[depth] if depth < 64 else "  " * depth
+
+
+# 演示默认输出，单元测试默认安静
+demo_output = VerboseOutput(default=True)
+test_output = VerboseOutput(default=False)